@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, register
+
+# Бэкенды, кэш которых живёт внутри одного процесса.
+LOCAL_CACHES = (LocMemCache, DummyCache)
+
+
+def cache_is_shared(alias='default'):
+    return not isinstance(caches[alias], LOCAL_CACHES)
+
+
+@register()
+def check_ratelimit_cache(app_configs, **kwargs):
+    """Лимиты запросов работают только с общим для воркеров кэшем.
+
+    С кэшем процесса реальный лимит умножается на число воркеров и
+    сбрасывается при каждом перезапуске.
+    """
+    if settings.RATELIMIT_ENABLED and not cache_is_shared():
+        return [Error(
+            'RATELIMIT_ENABLED требует общего кэша, а кэш default '
+            'локален для процесса.',
+            hint='Задайте CACHE_LOCATION или выключите RATELIMIT_ENABLED.',
+            id='core.E001',
+        )]
+    return []
@@ -0,0 +1,8 @@
+from django.conf import settings
+
+
+def live_updates(request):
+    """Добавляет адрес потока обновлений лент, если он включён."""
+    return {
+        'live_updates_url': settings.LIVE_UPDATES_URL
+    }
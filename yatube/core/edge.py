@@ -0,0 +1,127 @@
+import logging
+import re
+import time
+import weakref
+from functools import wraps
+
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+SURROGATE_KEY_HEADER = 'Surrogate-Key'
+S_MAXAGE = re.compile(r'\bs-maxage=(\d+)')
+
+_local_caches = weakref.WeakSet()
+
+
+def add_surrogate_keys(response, *keys):
+    """Дописывает ключи в заголовок Surrogate-Key ответа."""
+    current = response.get(SURROGATE_KEY_HEADER, '').split()
+    current.extend(key for key in keys if key not in current)
+    response[SURROGATE_KEY_HEADER] = ' '.join(current)
+    return response
+
+
+def cache_policy(max_age=0, s_maxage=60):
+    """Выставляет Cache-Control для view.
+
+    Анонимные ответы помечаются как ``public`` и могут храниться в CDN
+    ``s_maxage`` секунд, ответы авторизованным пользователям остаются
+    ``private``.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapped(request, *args, **kwargs):
+            response = view_func(request, *args, **kwargs)
+            if request.user.is_authenticated:
+                patch_cache_control(response, private=True, max_age=0)
+            else:
+                patch_cache_control(
+                    response,
+                    public=True,
+                    max_age=max_age,
+                    s_maxage=s_maxage,
+                )
+            return response
+        return wrapped
+    return decorator
+
+
+def log_purge(keys):
+    logger.info('Purge surrogate keys: %s', ' '.join(keys))
+
+
+def purge_local(keys):
+    for edge_cache in _local_caches:
+        edge_cache.purge(keys)
+
+
+def purge_surrogate_keys(*keys):
+    """Передаёт ключи в бэкенд из ``settings.EDGE_PURGE_BACKEND``."""
+    if keys:
+        import_string(settings.EDGE_PURGE_BACKEND)(sorted(set(keys)))
+
+
+class LocalEdgeCache:
+    """Простейший кэширующий прокси поверх WSGI-приложения.
+
+    Заменяет CDN в тестах и при локальных замерах: хранит ответы с
+    ``public`` и ``s-maxage`` не дольше ``s-maxage`` секунд и сбрасывает
+    их по ключам Surrogate-Key.
+    """
+
+    def __init__(self, application):
+        self.application = application
+        self.store = {}
+        self.hits = 0
+        self.misses = 0
+        _local_caches.add(self)
+
+    def __call__(self, environ, start_response):
+        key = (environ['PATH_INFO'], environ.get('QUERY_STRING', ''))
+        cacheable = (
+            environ['REQUEST_METHOD'] == 'GET'
+            and not environ.get('HTTP_COOKIE')
+        )
+        entry = self.store.get(key) if cacheable else None
+        if entry is not None and entry[4] > time.monotonic():
+            self.hits += 1
+            status, headers, body, _, _ = entry
+            start_response(status, headers)
+            return [body]
+        self.misses += 1
+        captured = {}
+
+        def capture(status, headers, exc_info=None):
+            captured['status'] = status
+            captured['headers'] = headers
+            return start_response(status, headers, exc_info)
+
+        body = b''.join(self.application(environ, capture))
+        headers = dict(captured['headers'])
+        cache_control = headers.get('Cache-Control', '')
+        s_maxage = S_MAXAGE.search(cache_control)
+        if (
+            cacheable
+            and captured['status'].startswith('200')
+            and 'public' in cache_control
+            and s_maxage
+            and int(s_maxage.group(1)) > 0
+        ):
+            surrogate_keys = headers.get(SURROGATE_KEY_HEADER, '').split()
+            self.store[key] = (
+                captured['status'], captured['headers'], body,
+                surrogate_keys, time.monotonic() + int(s_maxage.group(1)),
+            )
+        elif entry is not None:
+            self.store.pop(key, None)
+        return [body]
+
+    def purge(self, keys):
+        keys = set(keys)
+        self.store = {
+            path: entry for path, entry in self.store.items()
+            if not keys.intersection(entry[3])
+        }
@@ -0,0 +1,103 @@
+import asyncio
+import json
+from http.cookies import SimpleCookie
+from importlib import import_module
+from urllib.parse import parse_qs
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+
+from posts.models import Follow
+
+from .pubsub import get_broker, run_in_db_thread
+
+
+def follow_channels(session_key):
+    """Каналы авторов, на которых подписан владелец сессии."""
+    if not session_key:
+        return []
+    engine = import_module(settings.SESSION_ENGINE)
+    user_id = engine.SessionStore(session_key).get(SESSION_KEY)
+    if user_id is None:
+        return []
+    authors = Follow.objects.filter(user_id=user_id).values_list(
+        'author_id', flat=True)
+    return [f'author:{author_id}' for author_id in authors]
+
+
+async def resolve_channels(scope):
+    feed = parse_qs(scope.get('query_string', b'').decode()).get(
+        'feed', ['index'])[0]
+    if feed == 'index' or feed.startswith('group:'):
+        return [feed]
+    if feed == 'follow':
+        cookies = SimpleCookie()
+        for name, value in scope.get('headers', ()):
+            if name == b'cookie':
+                cookies.load(value.decode('latin-1'))
+        morsel = cookies.get(settings.SESSION_COOKIE_NAME)
+        return await run_in_db_thread(
+            follow_channels, morsel.value if morsel else None)
+    return []
+
+
+async def wait_disconnect(receive):
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
+
+
+async def stream(queue, send):
+    while True:
+        try:
+            message = await asyncio.wait_for(
+                queue.get(), settings.LIVE_UPDATES_KEEPALIVE)
+        except asyncio.TimeoutError:
+            chunk = b': keepalive\n\n'
+        else:
+            chunk = f'event: post\ndata: {json.dumps(message)}\n\n'.encode()
+        await send({
+            'type': 'http.response.body',
+            'body': chunk,
+            'more_body': True,
+        })
+
+
+async def live_updates(scope, receive, send):
+    """ASGI-обработчик потока server-sent events о новых постах.
+
+    Лента выбирается параметром ``feed``: ``index``, ``group:<slug>`` или
+    ``follow``. Пока клиент подключён, соединение держит только корутину
+    и очередь, поэтому воркер выдерживает тысячи простаивающих клиентов.
+    """
+    channels = await resolve_channels(scope)
+    if not channels:
+        await send({
+            'type': 'http.response.start',
+            'status': 403,
+            'headers': [(b'content-type', b'text/plain')],
+        })
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+    broker = get_broker()
+    queue = broker.subscribe(channels)
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ],
+    })
+    tasks = [
+        asyncio.ensure_future(stream(queue, send)),
+        asyncio.ensure_future(wait_disconnect(receive)),
+    ]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        broker.unsubscribe(queue)
@@ -0,0 +1,60 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import URLError
+from urllib.request import urlopen
+
+from django.core.management.base import BaseCommand
+
+
+def fetch(url):
+    started = time.perf_counter()
+    try:
+        with urlopen(url, timeout=30) as response:
+            response.read()
+            ok = response.status < 500
+    except (OSError, URLError):
+        ok = False
+    return time.perf_counter() - started, ok
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает запущенные серверы одновременными клиентами и сравнивает '
+        'пропускную способность и задержки, например WSGI (gunicorn) и ASGI '
+        '(uvicorn yatube.asgi:application).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'servers', nargs='+',
+            help='Базовые адреса серверов, например http://127.0.0.1:8000',
+        )
+        parser.add_argument(
+            '--path', action='append', dest='paths',
+            help='Страница для нагрузки, можно указать несколько раз.',
+        )
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--requests', type=int, default=500)
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or ['/', '/posts/1/']
+        concurrency = options['concurrency']
+        for server in options['servers']:
+            urls = [
+                server.rstrip('/') + paths[i % len(paths)]
+                for i in range(options['requests'])
+            ]
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                results = list(pool.map(fetch, urls))
+            elapsed = time.perf_counter() - started
+            timings = sorted(timing for timing, _ in results)
+            errors = sum(1 for _, ok in results if not ok)
+            p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+            self.stdout.write(
+                f'{server}: {len(urls) / elapsed:.1f} запросов/с при '
+                f'{concurrency} клиентах, медиана '
+                f'{statistics.median(timings) * 1000:.1f} мс, '
+                f'p99 {p99 * 1000:.1f} мс, ошибок {errors}'
+            )
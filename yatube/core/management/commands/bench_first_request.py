@@ -0,0 +1,74 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Выполняется в отдельном процессе, чтобы каждый замер начинался с холодного
+# воркера: импорт yatube.wsgi (с прогревом или без) и серия запросов.
+WORKER = '''
+import json, sys, time
+from django.test import RequestFactory
+import yatube.wsgi
+from django.conf import settings
+
+urls, rounds = json.loads(sys.argv[1]), int(sys.argv[2])
+factory = RequestFactory(SERVER_NAME=settings.WARMUP_HOST)
+timings = {}
+for url in urls:
+    timings[url] = []
+    for _ in range(rounds + 1):
+        started = time.perf_counter()
+        response = yatube.wsgi.application(
+            factory.get(url).environ, lambda *args: None)
+        for _ in response:
+            pass
+        response.close()
+        timings[url].append(time.perf_counter() - started)
+print(json.dumps(timings))
+'''
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает задержку первого запроса нового воркера с установившейся '
+        'без прогрева и с прогревом yatube.wsgi.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url', action='append', dest='urls',
+            help='Страница для замера, можно указать несколько раз.',
+        )
+        parser.add_argument('--rounds', type=int, default=20)
+
+    def handle(self, *args, **options):
+        urls = options['urls'] or ['/', '/trending/']
+        # Замеры и прогрев должны обращаться к одному хосту, иначе ключи
+        # кэша страниц не совпадут.
+        host = settings.WARMUP_HOST or settings.ALLOWED_HOSTS[0]
+        modes = (('без прогрева', 'False'), ('с прогревом', 'True'))
+        for label, warmup in modes:
+            result = subprocess.run(
+                [sys.executable, '-c', WORKER, json.dumps(urls),
+                 str(options['rounds'])],
+                cwd=settings.BASE_DIR, check=True, stdout=subprocess.PIPE,
+                universal_newlines=True,
+                env={
+                    **os.environ,
+                    'DJANGO_SETTINGS_MODULE': 'yatube.settings',
+                    'WSGI_WARMUP': warmup,
+                    'WARMUP_HOST': host,
+                },
+            )
+            self.stdout.write(f'{label}:')
+            for url, timings in json.loads(result.stdout).items():
+                first, steady = timings[0], statistics.median(timings[1:])
+                self.stdout.write(
+                    f'  {url}: первый запрос {first * 1000:.2f} мс, '
+                    f'затем {steady * 1000:.2f} мс '
+                    f'(x{first / steady:.1f})'
+                )
@@ -0,0 +1,60 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.template.loader import get_template
+from django.test import RequestFactory
+
+from posts.models import Post
+from posts.utils import paginate, post_cards
+
+
+def value_size(value):
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, str)):
+        return len(value.encode() if isinstance(value, str) else value)
+    return 8
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает объём данных, выбираемых из базы для страницы ленты, '
+        'и время её рендера при полной выборке и при выборке колонок '
+        'карточки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=20)
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        template = get_template('posts/group_list.html')
+        variants = {
+            'полные строки': Post.objects.select_related('author', 'group'),
+            'колонки карточки': post_cards(Post.objects.all()),
+        }
+        if not Post.objects.exists():
+            self.stdout.write('В базе нет постов для замера.')
+            return
+        for label, queryset in variants.items():
+            page_obj = paginate(request, queryset)
+            sql, params = page_obj.object_list.query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                fetched = sum(
+                    value_size(value)
+                    for row in cursor.fetchall()
+                    for value in row
+                )
+            started = time.perf_counter()
+            for _ in range(options['rounds']):
+                page_obj = paginate(request, queryset)
+                template.render({'page_obj': page_obj}, request)
+            elapsed = (time.perf_counter() - started) / options['rounds']
+            self.stdout.write(
+                f'{label}: {fetched} байт из базы на страницу, '
+                f'{elapsed * 1000:.2f} мс на выборку и рендер'
+            )
@@ -0,0 +1,41 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from django.urls import resolve, reverse
+
+from core.middleware import RateLimitMiddleware
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет накладные расходы ограничения частоты запросов на один '
+        'запрос к ограниченному и неограниченному URL.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        rounds = options['requests']
+        limited = reverse('posts:create')
+        urls = {
+            'ограниченный URL': limited,
+            'URL без лимита': reverse('posts:index'),
+        }
+        with override_settings(RATELIMIT_ENABLED=True, RATELIMITS={
+            'posts:create': {'rate': f'{rounds * 2}/m', 'methods': ('POST',)},
+        }):
+            middleware = RateLimitMiddleware(lambda request: HttpResponse())
+        for label, url in urls.items():
+            request = RequestFactory().post(url, REMOTE_ADDR='10.0.0.1')
+            request.user = AnonymousUser()
+            request.resolver_match = resolve(url)
+            started = time.perf_counter()
+            for _ in range(rounds):
+                middleware.process_view(request, None, (), {})
+            elapsed = (time.perf_counter() - started) / rounds
+            self.stdout.write(f'{label}: {elapsed * 1e6:.1f} мкс на запрос')
@@ -0,0 +1,62 @@
+import time
+
+from django.conf import settings
+from django.contrib.staticfiles.handlers import StaticFilesHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+
+from core.static import StaticFilesLayer
+from core.storage import CompressedManifestStaticFilesStorage
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает отдачу статического файла слоем StaticFilesLayer '
+        '(хэшированное имя, заранее сжатый вариант) и обработчиком '
+        'статики runserver. Перед замером нужен collectstatic.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--name', default='css/bootstrap.min.css')
+        parser.add_argument('--rounds', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        name = options['name']
+        try:
+            hashed = CompressedManifestStaticFilesStorage().stored_name(name)
+        except ValueError as error:
+            raise CommandError(
+                f'{error}. Сначала выполните collectstatic с DEBUG=False.')
+        django_application = WSGIHandler()
+        variants = {
+            'runserver': (StaticFilesHandler(django_application), name),
+            'StaticFilesLayer': (
+                StaticFilesLayer(
+                    django_application, settings.STATIC_ROOT,
+                    settings.STATIC_URL,
+                ),
+                hashed,
+            ),
+        }
+        for label, (application, path) in variants.items():
+            environ = RequestFactory().get(
+                settings.STATIC_URL + path,
+                HTTP_ACCEPT_ENCODING='gzip, deflate, br',
+            ).environ
+            captured = {}
+
+            def start_response(status, headers, exc_info=None):
+                captured['headers'] = dict(headers)
+
+            started = time.perf_counter()
+            for _ in range(options['rounds']):
+                response = application(dict(environ), start_response)
+                size = sum(len(chunk) for chunk in response)
+                if hasattr(response, 'close'):
+                    response.close()
+            elapsed = (time.perf_counter() - started) / options['rounds']
+            self.stdout.write(
+                f'{label}: {elapsed * 1e6:.0f} мкс на запрос, {size} байт, '
+                f'Cache-Control: {captured["headers"].get("Cache-Control")}'
+            )
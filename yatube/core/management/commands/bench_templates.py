@@ -0,0 +1,73 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.template.backends.django import DjangoTemplates
+from django.test import RequestFactory
+
+from posts.forms import CommentForm
+from posts.models import Post
+from posts.utils import comments_batch, paginate
+
+PLAIN_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+
+def make_backend(loaders):
+    config = dict(settings.TEMPLATES[0])
+    options = dict(config['OPTIONS'], loaders=loaders)
+    return DjangoTemplates({
+        'NAME': 'bench',
+        'DIRS': config['DIRS'],
+        'APP_DIRS': False,
+        'OPTIONS': options,
+    })
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время рендера index.html и post_detail.html с обычными '
+        'и с прогретыми кэширующими загрузчиками шаблонов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=50)
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        post = Post.objects.select_related('author', 'group').first()
+        pages = {
+            'posts/index.html': {
+                'page_obj': paginate(
+                    request,
+                    Post.objects.select_related('author', 'group'),
+                ),
+            },
+        }
+        if post is not None:
+            pages['posts/post_detail.html'] = {
+                'post': post,
+                'comments': comments_batch(post.comment.all())[0],
+                'form': CommentForm(),
+            }
+        cold = make_backend(PLAIN_LOADERS)
+        warm = make_backend([('django.template.loaders.cached.Loader',
+                              PLAIN_LOADERS)])
+        for name in pages:
+            warm.get_template(name)
+        for name, context in pages.items():
+            results = []
+            for backend in (cold, warm):
+                started = time.perf_counter()
+                for _ in range(options['rounds']):
+                    backend.get_template(name).render(context, request)
+                results.append(
+                    (time.perf_counter() - started) / options['rounds'])
+            self.stdout.write(
+                f'{name}: без кэша {results[0] * 1000:.2f} мс, '
+                f'прогретый кэш {results[1] * 1000:.2f} мс'
+            )
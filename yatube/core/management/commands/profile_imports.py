@@ -0,0 +1,92 @@
+import os
+import shlex
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+TARGETS = {
+    'wsgi': ['-c', 'import yatube.wsgi'],
+    'asgi': ['-c', 'import yatube.asgi'],
+}
+
+
+def parse_importtime(output):
+    """Строки ``-X importtime`` в список (модуль, своё время, всего, глубина).
+
+    Время в микросекундах, глубина — вложенность импорта.
+    """
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, own, total, name = line.replace('|', ':').split(':')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), int(own), int(total), depth))
+    return rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает, сколько стоит импорт модулей при старте воркера '
+        '(yatube.wsgi) или manage.py: самые дорогие модули и пакеты '
+        'по данным python -X importtime.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'target', nargs='?', default='wsgi',
+            choices=('wsgi', 'asgi', 'manage'),
+        )
+        parser.add_argument(
+            '--command', default='check',
+            help='Команда manage.py для цели manage, например "run_tasks".',
+        )
+        parser.add_argument('--top', type=int, default=15)
+        parser.add_argument('--runs', type=int, default=5)
+
+    def handle(self, *args, **options):
+        if options['target'] == 'manage':
+            argv = [
+                os.path.join(settings.BASE_DIR, 'manage.py'),
+                *shlex.split(options['command']),
+            ]
+        else:
+            argv = TARGETS[options['target']]
+        command = [sys.executable, *argv]
+        timings = []
+        for _ in range(options['runs']):
+            started = time.perf_counter()
+            subprocess.run(
+                command, cwd=settings.BASE_DIR, check=True,
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            timings.append(time.perf_counter() - started)
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', *argv],
+            cwd=settings.BASE_DIR, stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE, universal_newlines=True,
+        )
+        rows = parse_importtime(result.stderr)
+        total = sum(own for _, own, _, _ in rows)
+        self.stdout.write(
+            f'{" ".join(argv)}: запуск {statistics.median(timings) * 1000:.0f}'
+            f' мс (медиана из {options["runs"]}), импорт {total / 1000:.0f} мс'
+            f', модулей {len(rows)}'
+        )
+        packages = defaultdict(int)
+        for name, own, _, _ in rows:
+            packages[name.split('.')[0]] += own
+        self.stdout.write('\nПакеты по собственному времени импорта:')
+        for name, own in sorted(
+                packages.items(), key=lambda item: -item[1])[:options['top']]:
+            self.stdout.write(f'  {own / 1000:8.1f} мс  {name}')
+        self.stdout.write('\nМодули по суммарному времени импорта:')
+        for name, _, cumulative, depth in sorted(
+                rows, key=lambda row: -row[2])[:options['top']]:
+            self.stdout.write(
+                f'  {cumulative / 1000:8.1f} мс  {"  " * depth}{name}')
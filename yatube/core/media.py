@@ -0,0 +1,137 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseNotModified,
+)
+from django.utils.http import http_date, quote_etag
+from django.views.static import was_modified_since
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+BLOCK_SIZE = 64 * 1024
+
+
+class RangeFile:
+    """Файл, из которого читается не больше ``length`` байт с ``start``.
+
+    Читается блоками, поэтому память не растёт с размером диапазона, а
+    ``fileno`` позволяет серверу отправить его через ``os.sendfile``.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=BLOCK_SIZE):
+        if self.remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """Возвращает (начало, длина) единственного диапазона из Range.
+
+    ``None`` — заголовка нет или он не поддерживается (несколько
+    диапазонов), тогда отдаётся весь файл; ``ValueError`` — диапазон
+    невыполним.
+    """
+    match = RANGE.match(header or '')
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        start = max(size - int(last), 0)
+        end = size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        raise ValueError('Range Not Satisfiable')
+    return start, end - start + 1
+
+
+def media_path(path):
+    if '\x00' in path:
+        raise Http404
+    root = os.path.realpath(settings.MEDIA_ROOT)
+    filename = os.path.realpath(os.path.join(root, path))
+    if not filename.startswith(root + os.sep) or not os.path.isfile(filename):
+        raise Http404
+    return filename
+
+
+def serve(request, path):
+    """Отдаёт файл из MEDIA_ROOT с поддержкой Range и условных запросов.
+
+    Если задан ``MEDIA_ACCEL``, тело отдаёт веб-сервер: ответ содержит
+    только X-Accel-Redirect (nginx) или X-Sendfile (Apache, lighttpd).
+    """
+    filename = media_path(path)
+    stat = os.stat(filename)
+    etag = quote_etag(f'{stat.st_mtime_ns:x}-{stat.st_size:x}')
+    content_type, encoding = mimetypes.guess_type(filename)
+    not_modified = (
+        request.META.get('HTTP_IF_NONE_MATCH') == etag
+        if 'HTTP_IF_NONE_MATCH' in request.META
+        else not was_modified_since(
+            request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime)
+    )
+    if not_modified:
+        response = HttpResponseNotModified()
+    elif settings.MEDIA_ACCEL == 'x-accel-redirect':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = (
+            settings.MEDIA_ACCEL_PREFIX + quote(path))
+    elif settings.MEDIA_ACCEL == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = filename
+    else:
+        response = file_response(request, filename, stat.st_size, etag)
+        if content_type:
+            response['Content-Type'] = content_type
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = f'public, max-age={settings.MEDIA_MAX_AGE}'
+    return response
+
+
+def file_response(request, filename, size, etag):
+    try:
+        byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    if request.META.get('HTTP_IF_RANGE', etag) != etag:
+        byte_range = None
+    file = open(filename, 'rb')
+    if byte_range is None:
+        response = FileResponse(file)
+        response['Content-Length'] = str(size)
+    else:
+        start, length = byte_range
+        response = FileResponse(RangeFile(file, start, length), status=206)
+        response['Content-Length'] = str(length)
+        response['Content-Range'] = (
+            f'bytes {start}-{start + length - 1}/{size}')
+    response.block_size = BLOCK_SIZE
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -0,0 +1,104 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import render
+from django.urls import Resolver404, resolve
+from django.utils.cache import patch_vary_headers
+
+from .ratelimit import client_ident, hit, parse_rate
+
+GENERATION_KEY = 'anonymous_page:generation'
+
+
+def invalidate_anonymous_pages():
+    """Делает устаревшими все закэшированные анонимные страницы."""
+    if not cache.add(GENERATION_KEY, 1, None):
+        cache.incr(GENERATION_KEY)
+
+
+class AnonymousPageCacheMiddleware:
+    """Отдаёт анонимам готовый HTML до сессий и аутентификации.
+
+    Стоит перед ``SessionMiddleware``: если у запроса нет сессионной куки,
+    а URL входит в ``ANONYMOUS_CACHE_URL_NAMES``, ответ берётся из кэша без
+    обращения к сессиям и базе. Запросы с сессионной кукой всегда проходят
+    дальше, поэтому авторизованные пользователи анонимных страниц не видят.
+    Ключ включает схему и хост, так что у каждого сайта свой кэш.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self.is_cacheable_request(request):
+            return self.get_response(request)
+        key = self.cache_key(request)
+        response = cache.get(key)
+        if response is None:
+            response = self.get_response(request)
+            patch_vary_headers(response, ('Cookie',))
+            if self.is_cacheable_response(response):
+                cache.set(key, response, settings.ANONYMOUS_CACHE_TIMEOUT)
+        return response
+
+    def is_cacheable_request(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return False
+        if settings.SESSION_COOKIE_NAME in request.COOKIES:
+            return False
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return False
+        return match.view_name in settings.ANONYMOUS_CACHE_URL_NAMES
+
+    def is_cacheable_response(self, response):
+        return (
+            response.status_code == 200
+            and not response.cookies
+            and not response.streaming
+        )
+
+    def cache_key(self, request):
+        generation = cache.get_or_set(GENERATION_KEY, 1, None)
+        url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+        return f'anonymous_page:{generation}:{request.method}:{url}'
+
+
+class RateLimitMiddleware:
+    """Ограничивает частоту запросов к URL из ``RATELIMITS``.
+
+    Лимиты задаются по имени URL и считаются отдельно для каждого
+    пользователя, а для анонимов — для каждого IP-адреса. При превышении
+    view не вызывается, клиент получает 429 с заголовком Retry-After.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.limits = {}
+        if settings.RATELIMIT_ENABLED:
+            for view_name, config in settings.RATELIMITS.items():
+                limit, period = parse_rate(config['rate'])
+                methods = config.get('methods')
+                self.limits[view_name] = (limit, period, methods)
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        config = self.limits.get(request.resolver_match.view_name)
+        if config is None:
+            return None
+        limit, period, methods = config
+        if methods and request.method not in methods:
+            return None
+        retry_after = hit(
+            request.resolver_match.view_name, client_ident(request),
+            limit, period,
+        )
+        if not retry_after:
+            return None
+        response = render(request, 'core/429.html', status=429)
+        response['Retry-After'] = str(retry_after)
+        return response
@@ -0,0 +1,136 @@
+import asyncio
+import logging
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+def with_db_connection(func, *args):
+    """Вызывает ``func`` в потоке пула, закрывая устаревшие соединения.
+
+    Потоки ``run_in_executor`` живут долго, поэтому соединение потока
+    проверяется до запроса и после него, как в начале и конце запроса WSGI.
+    """
+    close_old_connections()
+    try:
+        return func(*args)
+    finally:
+        close_old_connections()
+
+
+async def run_in_db_thread(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, with_db_connection, func, *args)
+
+
+class LocalBackend:
+    """Публикация и подписка внутри одного процесса.
+
+    Подписчики — корутины asyncio, публиковать можно из любого потока.
+    """
+
+    def __init__(self):
+        self.subscribers = defaultdict(set)
+        self.loop = None
+
+    def subscribe(self, channels):
+        self.loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=settings.LIVE_UPDATES_QUEUE_SIZE)
+        for channel in channels:
+            self.subscribers[channel].add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        for channel, queues in list(self.subscribers.items()):
+            queues.discard(queue)
+            if not queues:
+                del self.subscribers[channel]
+
+    def publish(self, channels, message):
+        if self.loop is None or self.loop.is_closed():
+            return
+        self.loop.call_soon_threadsafe(self.deliver, channels, message)
+
+    def deliver(self, channels, message):
+        queues = set()
+        for channel in channels:
+            queues.update(self.subscribers.get(channel, ()))
+        for queue in queues:
+            if not queue.full():
+                queue.put_nowait(message)
+
+
+class PollingBackend(LocalBackend):
+    """Локальный брокер, который сам узнаёт о новых постах из базы.
+
+    Нужен, когда посты создаются в WSGI-процессах: один опрос таблицы на
+    процесс раздаёт события всем подключённым клиентам.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.poller = None
+
+    def subscribe(self, channels):
+        queue = super().subscribe(channels)
+        if self.poller is None or self.poller.done():
+            self.poller = self.loop.create_task(self.poll())
+        return queue
+
+    def publish(self, channels, message):
+        # Новые посты и так попадут в опрос базы.
+        pass
+
+    async def poll(self):
+        from posts.models import Post
+
+        def latest_id():
+            return Post.objects.order_by('-pk').values_list(
+                'pk', flat=True).first() or 0
+
+        def new_posts(last_id):
+            return list(
+                Post.objects.filter(pk__gt=last_id).order_by('pk').values(
+                    'pk', 'author_id', 'author__username', 'group__slug',
+                )[:100]
+            )
+
+        last_id = None
+        while self.subscribers:
+            try:
+                if last_id is None:
+                    last_id = await run_in_db_thread(latest_id)
+                rows = await run_in_db_thread(new_posts, last_id)
+            except DatabaseError:
+                logger.warning('Опрос новых постов не удался', exc_info=True)
+                rows = []
+            for row in rows:
+                last_id = row['pk']
+                self.deliver(*post_event(
+                    row['pk'], row['author_id'], row['author__username'],
+                    row['group__slug'],
+                ))
+            await asyncio.sleep(settings.LIVE_UPDATES_POLL_INTERVAL)
+
+
+def post_event(post_id, author_id, username, group_slug):
+    """Каналы и сообщение о новом посте."""
+    channels = ['index', f'author:{author_id}']
+    if group_slug:
+        channels.append(f'group:{group_slug}')
+    message = {'id': post_id, 'author': username, 'group': group_slug}
+    return channels, message
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        _broker = import_string(settings.LIVE_UPDATES_BACKEND)()
+    return _broker
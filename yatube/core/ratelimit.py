@@ -0,0 +1,51 @@
+import time
+
+from django.core.cache import cache
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """Разбирает лимит вида ``'10/m'`` в пару (запросов, секунд)."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period]
+
+
+def client_ident(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    return f'ip:{request.META.get("REMOTE_ADDR", "")}'
+
+
+def hit(scope, ident, limit, period, now=None):
+    """Учитывает запрос и возвращает, через сколько секунд можно повторить.
+
+    Скользящее окно из двух счётчиков фиксированных окон: текущий
+    увеличивается атомарным ``incr`` кэша, а предыдущий учитывается с весом
+    оставшейся доли окна. Считаются только принятые запросы, поэтому
+    клиент, который повторяет отклонённый запрос, не продлевает себе
+    блокировку. Возвращает 0, если лимит не превышен.
+    """
+    now = time.time() if now is None else now
+    window, elapsed = divmod(now, period)
+    window = int(window)
+    key = f'ratelimit:{scope}:{ident}:{window}'
+    previous_key = f'ratelimit:{scope}:{ident}:{window - 1}'
+    counters = cache.get_many([key, previous_key])
+    weighted = counters.get(previous_key, 0) * (1 - elapsed / period)
+    retry_after = int(period - elapsed) + 1
+    if weighted + counters.get(key, 0) + 1 > limit:
+        return retry_after
+    try:
+        current = cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, period * 2):
+            current = 1
+        else:
+            current = cache.incr(key)
+    if weighted + current > limit:
+        # Параллельный запрос успел раньше: возвращаем свой учёт.
+        cache.decr(key)
+        return retry_after
+    return 0
@@ -0,0 +1,120 @@
+import mimetypes
+import os
+import re
+from email.utils import formatdate
+
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^/.]+$')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'public, max-age=0, must-revalidate'
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+BLOCK_SIZE = 64 * 1024
+
+
+class StaticFilesLayer:
+    """Отдаёт собранную статику до Django.
+
+    Запросы к ``prefix`` обслуживаются прямо из ``root``: выбирается заранее
+    сжатый вариант по Accept-Encoding, хэшированные имена получают
+    кэширование на год, а файл передаётся через ``wsgi.file_wrapper``, чтобы
+    сервер мог отправить его через sendfile. Остальные запросы уходят в
+    приложение.
+    """
+
+    def __init__(self, application, root, prefix):
+        self.application = application
+        self.root = os.path.realpath(root)
+        self.prefix = prefix
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if (
+            not path.startswith(self.prefix)
+            or environ['REQUEST_METHOD'] not in ('GET', 'HEAD')
+        ):
+            return self.application(environ, start_response)
+        filename = self.find(path[len(self.prefix):])
+        if filename is None:
+            return self.application(environ, start_response)
+        return self.serve(environ, start_response, filename)
+
+    def find(self, name):
+        if '\x00' in name:
+            return None
+        filename = os.path.realpath(os.path.join(self.root, name))
+        if not filename.startswith(self.root + os.sep):
+            return None
+        if not os.path.isfile(filename):
+            return None
+        return filename
+
+    def serve(self, environ, start_response, filename):
+        content_type, _ = mimetypes.guess_type(filename)
+        headers = [
+            ('Content-Type', content_type or 'application/octet-stream'),
+            ('Vary', 'Accept-Encoding'),
+            ('Cache-Control', (
+                IMMUTABLE if HASHED_NAME.search(filename) else REVALIDATE
+            )),
+        ]
+        codings = parse_accept_encoding(
+            environ.get('HTTP_ACCEPT_ENCODING', ''))
+        preferred = sorted(
+            ENCODINGS, key=lambda item: -quality(codings, item[0]))
+        for encoding, suffix in preferred:
+            if quality(codings, encoding) <= 0:
+                break
+            if os.path.isfile(filename + suffix):
+                filename += suffix
+                headers.append(('Content-Encoding', encoding))
+                break
+        stat = os.stat(filename)
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        headers.append(('ETag', etag))
+        headers.append(
+            ('Last-Modified', formatdate(stat.st_mtime, usegmt=True)))
+        if environ.get('HTTP_IF_NONE_MATCH') == etag:
+            start_response('304 Not Modified', headers)
+            return []
+        headers.append(('Content-Length', str(stat.st_size)))
+        start_response('200 OK', headers)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        file = open(filename, 'rb')
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        if file_wrapper is not None:
+            return file_wrapper(file, BLOCK_SIZE)
+        return iter_file(file)
+
+
+def parse_accept_encoding(header):
+    """Разбирает Accept-Encoding в словарь {кодирование: q}."""
+    codings = {}
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        codings[coding] = q
+    return codings
+
+
+def quality(codings, coding):
+    """Вес кодирования: явный, иначе от ``*``, иначе 0 (RFC 7231)."""
+    return codings.get(coding, codings.get('*', 0.0))
+
+
+def iter_file(file):
+    with file:
+        while True:
+            block = file.read(BLOCK_SIZE)
+            if not block:
+                return
+            yield block
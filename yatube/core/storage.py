@@ -0,0 +1,179 @@
+import gzip
+import io
+import json
+import mmap
+import os
+import struct
+import threading
+from datetime import datetime
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import File
+from django.core.files.storage import Storage
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+from django.utils.encoding import filepath_to_uri
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.svg', '.json', '.txt', '.html', '.xml', '.map',
+)
+
+
+def compressors():
+    yield '.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0)
+    if brotli is not None:
+        yield '.br', lambda data: brotli.compress(data, quality=11)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Хэширует имена статики и заранее сжимает текстовые файлы.
+
+    Рядом с каждым хэшированным CSS/JS/SVG при ``collectstatic`` кладутся
+    ``.gz`` и, если установлен пакет brotli, ``.br`` — их отдаёт
+    ``core.static.StaticFilesLayer`` без сжатия на лету.
+    """
+
+    def post_process(self, *args, **kwargs):
+        hashed_files = set()
+        for name, hashed_name, processed in super().post_process(
+                *args, **kwargs):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_files.add(hashed_name)
+            yield name, hashed_name, processed
+        for hashed_name in hashed_files:
+            self.compress(hashed_name)
+
+    def compress(self, name):
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+            return
+        path = self.path(name)
+        with open(path, 'rb') as source:
+            data = source.read()
+        for suffix, compress in compressors():
+            compressed = compress(data)
+            if len(compressed) >= len(data):
+                continue
+            with open(path + suffix, 'wb') as target:
+                target.write(compressed)
+            os.utime(path + suffix, (os.path.getmtime(path),) * 2)
+
+
+SNAPSHOT_HEADER = struct.Struct('<Q')
+
+
+@deconstructible
+class InMemoryStorage(Storage):
+    """Хранилище файлов в памяти процесса для тестов и замеров.
+
+    Экземпляры с одним ``namespace`` видят одни и те же файлы, поэтому
+    поле ``Post.image`` и sorl-thumbnail, создающий своё хранилище по
+    пути класса, работают с общим набором. Если задан ``snapshot``, файлы
+    при первом обращении к пространству загружаются из снимка через mmap
+    без копирования, а ``save_snapshot`` записывает текущее состояние.
+    """
+
+    _namespaces = {}
+    _lock = threading.Lock()
+
+    def __init__(self, namespace='default', base_url=None, snapshot=None):
+        self.namespace = namespace
+        self.base_url = base_url
+        self.snapshot = snapshot
+        with self._lock:
+            if namespace not in self._namespaces:
+                self._namespaces[namespace] = (
+                    load_snapshot(snapshot)
+                    if snapshot and os.path.exists(snapshot) else {}
+                )
+            self.files = self._namespaces[namespace]
+
+    def _open(self, name, mode='rb'):
+        try:
+            data, _ = self.files[name]
+        except KeyError:
+            raise FileNotFoundError(name)
+        return File(io.BytesIO(data), name=name)
+
+    def _save(self, name, content):
+        if hasattr(content, 'seek') and content.seekable():
+            content.seek(0)
+        data = b''.join(content.chunks())
+        with self._lock:
+            self.files[name] = (data, timezone.now())
+        return name
+
+    def delete(self, name):
+        with self._lock:
+            self.files.pop(name, None)
+
+    def exists(self, name):
+        return name in self.files
+
+    def listdir(self, path):
+        prefix = path.rstrip('/') + '/' if path else ''
+        directories, files = set(), []
+        for name in list(self.files):
+            if not name.startswith(prefix):
+                continue
+            head, _, tail = name[len(prefix):].partition('/')
+            if tail:
+                directories.add(head)
+            else:
+                files.append(head)
+        return sorted(directories), sorted(files)
+
+    def size(self, name):
+        return len(self.files[name][0])
+
+    def url(self, name):
+        base_url = self.base_url or settings.MEDIA_URL
+        return urljoin(base_url, filepath_to_uri(name))
+
+    def get_modified_time(self, name):
+        return self.files[name][1]
+
+    get_created_time = get_accessed_time = get_modified_time
+
+    def clear(self):
+        with self._lock:
+            self.files.clear()
+
+    def save_snapshot(self, path=None):
+        """Записывает все файлы пространства в один файл снимка."""
+        path = path or self.snapshot
+        index, offset = {}, 0
+        items = sorted(self.files.items())
+        for name, (data, modified) in items:
+            index[name] = (offset, len(data), modified.timestamp())
+            offset += len(data)
+        header = json.dumps(index).encode()
+        with open(path, 'wb') as snapshot:
+            snapshot.write(SNAPSHOT_HEADER.pack(len(header)))
+            snapshot.write(header)
+            for _, (data, _) in items:
+                snapshot.write(data)
+
+
+def load_snapshot(path):
+    with open(path, 'rb') as snapshot:
+        if not os.fstat(snapshot.fileno()).st_size:
+            return {}
+        mapped = mmap.mmap(snapshot.fileno(), 0, access=mmap.ACCESS_READ)
+    (length,) = SNAPSHOT_HEADER.unpack_from(mapped)
+    start = SNAPSHOT_HEADER.size + length
+    index = json.loads(mapped[SNAPSHOT_HEADER.size:start])
+    view = memoryview(mapped)
+    return {
+        name: (
+            view[start + offset:start + offset + size],
+            datetime.fromtimestamp(modified, timezone.utc),
+        )
+        for name, (offset, size, modified) in index.items()
+    }
@@ -0,0 +1,62 @@
+import shutil
+import tempfile
+
+from django.test import override_settings
+from django.utils.functional import empty
+from sorl.thumbnail.default import storage as thumbnail_storage
+
+from .storage import InMemoryStorage
+
+
+class TempMediaMixin:
+    """Отдельный временный MEDIA_ROOT для каждого класса тестов.
+
+    Каталог создаётся до данных класса и удаляется после него, поэтому
+    классы, запущенные параллельно (``manage.py test --parallel``), не
+    удаляют файлы друг друга.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp(prefix='yatube-media-')
+        cls.media_settings = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.media_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+
+class InMemoryMediaMixin:
+    """Загрузки и миниатюры класса тестов хранятся в памяти.
+
+    ``Post.image`` и sorl-thumbnail пишут в ``InMemoryStorage``, который
+    очищается после класса. Память у каждого процесса своя, поэтому при
+    параллельном запуске классы тоже не мешают друг другу.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        storage = 'core.storage.InMemoryStorage'
+        cls.media_settings = override_settings(
+            DEFAULT_FILE_STORAGE=storage,
+            THUMBNAIL_STORAGE=storage,
+        )
+        cls.media_settings.enable()
+        reset_thumbnail_storage()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        InMemoryStorage().clear()
+        cls.media_settings.disable()
+        reset_thumbnail_storage()
+
+
+def reset_thumbnail_storage():
+    # sorl-thumbnail создаёт хранилище один раз и не следит за настройками
+    thumbnail_storage._wrapped = empty
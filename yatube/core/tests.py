@@ -1,4 +1,45 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile, File
+from django.core.management import call_command
+from django.core.wsgi import get_wsgi_application
+from django.db import DatabaseError
+from django.test import (
+    Client, RequestFactory, SimpleTestCase, TestCase, override_settings,
+)
+from django.urls import reverse
+from django.utils.cache import get_cache_key
+
+from PIL import Image
+from sorl.thumbnail import get_thumbnail
+
+from posts.models import Group, Post
+
+from . import pubsub
+from .asgi_bridge import WsgiBridge
+from .checks import check_ratelimit_cache
+from .edge import LocalEdgeCache, purge_local
+from .events import live_updates
+from .management.commands.profile_imports import parse_importtime
+from .middleware import AnonymousPageCacheMiddleware
+from .ratelimit import hit
+from .static import StaticFilesLayer, parse_accept_encoding
+from .storage import InMemoryStorage
+from .testing import InMemoryMediaMixin, TempMediaMixin
+from .warmup import warm_pages, warm_templates, warm_urls
+
+User = get_user_model()
 
 
 class CoreURLTest(TestCase):
@@ -6,3 +47,611 @@ class CoreURLTest(TestCase):
         """Проверка отдачи кастомного шаблона 404"""
         response = self.client.get('/unexisting_page/')
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+class WarmupTest(TestCase):
+    def test_all_templates_compile(self):
+        """Все шаблоны проекта компилируются при прогреве."""
+        self.assertGreater(warm_templates(), 0)
+
+    def test_posts_urls_are_compiled(self):
+        """Все маршруты posts компилируются при прогреве."""
+        self.assertGreater(warm_urls(), 0)
+
+    @override_settings(WARMUP_HOST='testserver')
+    def test_index_served_from_cache_after_warm_up(self):
+        """После прогрева первый запрос к ленте не обращается к базе."""
+        user = User.objects.create_user(username='TestUser')
+        Post.objects.create(author=user, text='Тестовый текст')
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.assertEqual(
+            warm_pages(get_wsgi_application()), {'/': '200 OK'})
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Тестовый текст')
+
+    @override_settings(
+        WARMUP_HOST='other.example',
+        ALLOWED_HOSTS=['testserver', 'other.example'],
+    )
+    def test_pages_warmed_only_for_their_host(self):
+        """Страница прогревается в кэше только для WARMUP_HOST."""
+        cache.clear()
+        self.addCleanup(cache.clear)
+        warm_pages(get_wsgi_application())
+        middleware = AnonymousPageCacheMiddleware(None)
+        factory = RequestFactory()
+        url = reverse('posts:index')
+        warmed = factory.get(url, HTTP_HOST='other.example')
+        other = factory.get(url)
+        self.assertIsNotNone(get_cache_key(warmed, 'index_page'))
+        self.assertIsNotNone(cache.get(middleware.cache_key(warmed)))
+        self.assertIsNone(get_cache_key(other, 'index_page'))
+        self.assertIsNone(cache.get(middleware.cache_key(other)))
+
+    @override_settings(WARMUP_HOST='')
+    def test_pages_not_warmed_without_host(self):
+        """Без WARMUP_HOST страницы не прогреваются впустую."""
+        self.assertEqual(warm_pages(get_wsgi_application()), {})
+
+    def test_warm_up_does_not_load_test_client(self):
+        """Модуль прогрева не тянет django.test в воркер."""
+        result = subprocess.run(
+            [sys.executable, '-c', (
+                'import django, sys; django.setup(); import core.warmup; '
+                'print("django.test" in sys.modules)'
+            )],
+            cwd=settings.BASE_DIR, stdout=subprocess.PIPE,
+            universal_newlines=True, check=True,
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'yatube.settings'},
+        )
+        self.assertEqual(result.stdout.split(), ['False'])
+
+
+class AnonymousPageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.create(
+            author=cls.user,
+            text='Тестовый текст',
+            group=cls.group,
+        )
+        cls.url = reverse('posts:group_list', kwargs={'slug': 'test-slug'})
+
+    def setUp(self):
+        cache.clear()
+
+    def test_anonymous_page_served_without_queries(self):
+        """Повторный анонимный запрос отдаётся из кэша без базы."""
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(first.content, second.content)
+        self.assertIn('Cookie', second['Vary'])
+
+    def test_authorized_user_never_gets_anonymous_page(self):
+        """Авторизованный пользователь получает свою версию страницы."""
+        self.client.get(self.url)
+        authorized_client = Client()
+        authorized_client.force_login(self.user)
+        response = authorized_client.get(self.url)
+        self.assertContains(response, 'Пользователь: TestUser')
+
+    def test_new_post_invalidates_anonymous_pages(self):
+        """Новый пост сбрасывает закэшированные анонимные страницы."""
+        self.client.get(self.url)
+        Post.objects.create(
+            author=self.user,
+            text='Свежий пост',
+            group=self.group,
+        )
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Свежий пост')
+
+    @override_settings(ALLOWED_HOSTS=['testserver', 'other.example'])
+    def test_pages_cached_per_host_and_scheme(self):
+        """Каждые хост и схема получают свою копию страницы."""
+        middleware = AnonymousPageCacheMiddleware(None)
+        factory = RequestFactory()
+        keys = {
+            middleware.cache_key(factory.get(self.url, **extra))
+            for extra in ({}, {'HTTP_HOST': 'other.example'}, {'secure': True})
+        }
+        self.assertEqual(len(keys), 3)
+
+
+class LocalEdgeCacheTest(TestCase):
+    def setUp(self):
+        self.calls = 0
+        self.edge = LocalEdgeCache(self.application)
+
+    def application(self, environ, start_response):
+        self.calls += 1
+        start_response('200 OK', [
+            ('Cache-Control', 'public, max-age=0, s-maxage=60'),
+            ('Surrogate-Key', 'index post-1'),
+        ])
+        return [b'page']
+
+    def get(self, path='/', **extra):
+        environ = RequestFactory().get(path, **extra).environ
+        return b''.join(self.edge(environ, lambda *args: None))
+
+    def test_public_response_served_from_edge(self):
+        """Публичный ответ отдаётся прокси без обращения к приложению."""
+        self.get()
+        self.assertEqual(self.get(), b'page')
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.edge.hits, 1)
+
+    def test_requests_with_cookies_bypass_edge(self):
+        """Запросы с куками всегда проходят в приложение."""
+        self.get()
+        self.get(HTTP_COOKIE='sessionid=1')
+        self.assertEqual(self.calls, 2)
+
+    def test_purge_by_surrogate_key(self):
+        """Сброс по ключу удаляет закэшированные страницы."""
+        self.get()
+        purge_local(['post-1'])
+        self.get()
+        self.assertEqual(self.calls, 2)
+
+    def test_entries_expire_after_s_maxage(self):
+        """Ответ хранится не дольше s-maxage."""
+        now = time.monotonic()
+        with patch('core.edge.time.monotonic', return_value=now):
+            self.get()
+        with patch('core.edge.time.monotonic', return_value=now + 59):
+            self.get()
+        self.assertEqual(self.calls, 1)
+        with patch('core.edge.time.monotonic', return_value=now + 61):
+            self.get()
+        self.assertEqual(self.calls, 2)
+
+
+@override_settings(RATELIMIT_ENABLED=True, RATELIMITS={
+    'posts:add_comment': {'rate': '2/m', 'methods': ('POST',)},
+})
+class RateLimitTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый текст')
+        cls.url = reverse(
+            'posts:add_comment', kwargs={'post_id': cls.post.pk})
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_writes_over_limit_get_429(self):
+        """Запросы сверх лимита получают 429 и не доходят до view."""
+        for _ in range(2):
+            response = self.authorized_client.post(
+                self.url, {'text': 'Комментарий'})
+            self.assertEqual(response.status_code, 302)
+        response = self.authorized_client.post(
+            self.url, {'text': 'Лишний комментарий'})
+        self.assertEqual(response.status_code, 429)
+        self.assertTemplateUsed(response, 'core/429.html')
+        self.assertTrue(int(response['Retry-After']) > 0)
+        self.assertEqual(self.post.comment.count(), 2)
+
+    def test_other_methods_and_clients_are_not_limited(self):
+        """Лимит считается по методу и отдельно для каждого клиента."""
+        for _ in range(3):
+            self.authorized_client.post(self.url, {'text': 'Комментарий'})
+        response = self.client.post(self.url, {'text': 'Комментарий'})
+        self.assertEqual(response.status_code, 302)
+        response = self.authorized_client.get(self.url)
+        self.assertNotEqual(response.status_code, 429)
+
+    def test_previous_window_is_weighted(self):
+        """Запросы прошлого окна учитываются пропорционально времени."""
+        for _ in range(4):
+            hit('scope', 'ident', 4, 60, now=59)
+        self.assertTrue(hit('scope', 'ident', 4, 60, now=61))
+        cache.clear()
+        for _ in range(4):
+            hit('scope', 'ident', 4, 60, now=1)
+        self.assertEqual(hit('scope', 'ident', 4, 60, now=119), 0)
+
+    def test_rejected_hits_are_not_counted(self):
+        """Отклонённые повторы не продлевают блокировку клиента."""
+        for _ in range(2):
+            self.assertEqual(hit('scope', 'ident', 2, 60, now=0), 0)
+        for _ in range(10):
+            self.assertTrue(hit('scope', 'ident', 2, 60, now=30))
+        self.assertEqual(hit('scope', 'ident', 2, 60, now=100), 0)
+
+    def test_local_cache_is_rejected_by_check(self):
+        """Лимиты нельзя включить с кэшем, локальным для процесса."""
+        with self.settings(RATELIMIT_ENABLED=True):
+            errors = check_ratelimit_cache(None)
+        self.assertEqual([error.id for error in errors], ['core.E001'])
+        with self.settings(RATELIMIT_ENABLED=False):
+            self.assertEqual(check_ratelimit_cache(None), [])
+
+
+class StaticPipelineTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.source = tempfile.mkdtemp()
+        cls.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(cls.source, 'css'))
+        with open(os.path.join(cls.source, 'css', 'site.css'), 'w') as file:
+            file.write('body { color: black; }\n' * 100)
+        with override_settings(
+            STATICFILES_DIRS=[cls.source],
+            STATIC_ROOT=cls.root,
+            STATICFILES_STORAGE=(
+                'core.storage.CompressedManifestStaticFilesStorage'),
+        ):
+            call_command('collectstatic', interactive=False, verbosity=0)
+        cls.hashed = next(
+            name for name in os.listdir(os.path.join(cls.root, 'css'))
+            if name.endswith('.css') and name != 'site.css'
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.source, ignore_errors=True)
+        shutil.rmtree(cls.root, ignore_errors=True)
+        super().tearDownClass()
+
+    def request(self, path, **environ):
+        def application(environ, start_response):
+            start_response('404 Not Found', [])
+            return [b'django']
+
+        layer = StaticFilesLayer(application, self.root, '/static/')
+        captured = {}
+
+        def start_response(status, headers, exc_info=None):
+            captured['status'] = status
+            captured['headers'] = dict(headers)
+
+        environ = RequestFactory().get(path, **environ).environ
+        body = b''.join(layer(environ, start_response))
+        return captured['status'], captured['headers'], body
+
+    def test_collectstatic_writes_compressed_variant(self):
+        """Рядом с хэшированным файлом лежит его gzip-версия."""
+        path = os.path.join(self.root, 'css', self.hashed)
+        with open(path, 'rb') as file, gzip.open(path + '.gz') as packed:
+            self.assertEqual(file.read(), packed.read())
+
+    def test_hashed_file_served_compressed_and_immutable(self):
+        """Хэшированный файл отдаётся сжатым и кэшируется на год."""
+        status, headers, body = self.request(
+            f'/static/css/{self.hashed}', HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', headers['Cache-Control'])
+        self.assertEqual(headers['Content-Type'], 'text/css')
+        self.assertIn(b'color: black', gzip.decompress(body))
+
+    def test_accept_encoding_quality_values(self):
+        """Кодирование с q=0 или похожим именем не выбирается."""
+        self.assertEqual(
+            parse_accept_encoding('gzip;q=0.5, BR ; q=0, *;q=0.1'),
+            {'gzip': 0.5, 'br': 0.0, '*': 0.1},
+        )
+        for header in ('gzip;q=0, br', 'gzip; q=0', 'x-gzip-brotli', ''):
+            with self.subTest(header=header):
+                _, headers, _ = self.request(
+                    f'/static/css/{self.hashed}',
+                    HTTP_ACCEPT_ENCODING=header)
+                self.assertNotEqual(headers.get('Content-Encoding'), 'gzip')
+        _, headers, _ = self.request(
+            f'/static/css/{self.hashed}', HTTP_ACCEPT_ENCODING='*')
+        self.assertIn(headers.get('Content-Encoding'), ('br', 'gzip'))
+
+    def test_conditional_and_missing_requests(self):
+        """Совпавший ETag даёт 304, неизвестные файлы уходят в Django."""
+        _, headers, body = self.request('/static/css/site.css')
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertIn('must-revalidate', headers['Cache-Control'])
+        status, _, _ = self.request(
+            '/static/css/site.css', HTTP_IF_NONE_MATCH=headers['ETag'])
+        self.assertEqual(status, '304 Not Modified')
+        status, _, body = self.request('/static/../settings.py')
+        self.assertEqual(body, b'django')
+        status, _, body = self.request('/static/css/site%00.css')
+        self.assertEqual(body, b'django')
+
+
+class MediaServeTest(TempMediaMixin, SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(cls.media_root, 'posts'))
+        cls.content = bytes(range(256)) * 10
+        with open(os.path.join(cls.media_root, 'posts', 'cat.jpg'), 'wb') as f:
+            f.write(cls.content)
+        cls.url = '/media/posts/cat.jpg'
+
+    def test_full_file_and_conditional_request(self):
+        """Файл отдаётся целиком, совпавший ETag даёт 304."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        response = self.client.get(
+            self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_range_requests(self):
+        """Диапазоны отдаются с 206, невыполнимые — с 416."""
+        cases = {
+            'bytes=10-19': (10, 20),
+            'bytes=2550-': (2550, 2560),
+            'bytes=-5': (2555, 2560),
+            'bytes=2555-9999': (2555, 2560),
+        }
+        for header, (start, end) in cases.items():
+            with self.subTest(header=header):
+                response = self.client.get(self.url, HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(
+                    response['Content-Range'],
+                    f'bytes {start}-{end - 1}/2560',
+                )
+                self.assertEqual(
+                    b''.join(response.streaming_content),
+                    self.content[start:end],
+                )
+        response = self.client.get(self.url, HTTP_RANGE='bytes=3000-')
+        self.assertEqual(response.status_code, 416)
+
+    @override_settings(MEDIA_ACCEL='x-accel-redirect')
+    def test_accel_redirect_delegates_body(self):
+        """С X-Accel-Redirect тело отдаёт веб-сервер."""
+        response = self.client.get(self.url)
+        self.assertEqual(
+            response['X-Accel-Redirect'], '/protected-media/posts/cat.jpg')
+        self.assertEqual(response.content, b'')
+
+    def test_paths_outside_media_root_not_found(self):
+        """Файлы вне MEDIA_ROOT недоступны."""
+        response = self.client.get('/media/../manage.py')
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get('/media/posts/cat%00.jpg')
+        self.assertEqual(response.status_code, 404)
+
+
+class InMemoryStorageTest(InMemoryMediaMixin, TestCase):
+    def setUp(self):
+        self.storage = InMemoryStorage()
+        self.storage.clear()
+
+    def test_files_are_shared_between_instances(self):
+        """Файлы видны всем экземплярам хранилища и не пишутся на диск."""
+        name = self.storage.save('posts/note.txt', ContentFile(b'hello'))
+        other = InMemoryStorage()
+        self.assertTrue(other.exists(name))
+        self.assertEqual(other.open(name).read(), b'hello')
+        self.assertEqual(other.size(name), 5)
+        self.assertEqual(other.url(name), '/media/posts/note.txt')
+        self.assertEqual(other.listdir(''), (['posts'], []))
+        self.assertEqual(other.listdir('posts'), ([], ['note.txt']))
+        other.delete(name)
+        self.assertFalse(self.storage.exists(name))
+
+    def test_snapshot_round_trip(self):
+        """Снимок восстанавливает файлы в новом пространстве имён."""
+        self.storage.save('a.txt', ContentFile(b'first'))
+        self.storage.save('b/c.txt', ContentFile(b'second'))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'media.snapshot')
+            self.storage.save_snapshot(path)
+            restored = InMemoryStorage(namespace='restored', snapshot=path)
+            self.assertEqual(restored.open('b/c.txt').read(), b'second')
+            self.assertEqual(
+                restored.get_modified_time('a.txt'),
+                self.storage.get_modified_time('a.txt'),
+            )
+            restored.clear()
+
+    def test_post_image_thumbnail_in_memory(self):
+        """Картинка поста и её миниатюра создаются в памяти."""
+        user = User.objects.create_user(username='TestUser')
+        buffer = tempfile.SpooledTemporaryFile()
+        Image.new('RGB', (40, 20), 'red').save(buffer, 'JPEG')
+        post = Post.objects.create(author=user, text='Тестовый текст')
+        post.image.save('red.jpg', File(buffer))
+        thumbnail = get_thumbnail(post.image, '20x10')
+        self.assertTrue(self.storage.exists(post.image.name))
+        self.assertTrue(self.storage.exists(thumbnail.name))
+        self.assertEqual((thumbnail.width, thumbnail.height), (20, 10))
+
+
+class ProfileImportsTest(SimpleTestCase):
+    def test_importtime_output_is_parsed(self):
+        """Вывод -X importtime разбирается в модули с глубиной."""
+        output = (
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       120 |        120 |   django.utils\n'
+            'import time:       300 |        420 | django\n'
+        )
+        self.assertEqual(parse_importtime(output), [
+            ('django.utils', 120, 120, 1),
+            ('django', 300, 420, 0),
+        ])
+
+    def test_startup_does_not_import_broker_or_admin_modules(self):
+        """django.setup() не загружает брокер и модули admin приложений."""
+        deferred = ('core.pubsub', 'posts.admin', 'tasks.admin')
+        result = subprocess.run(
+            [sys.executable, '-c', (
+                'import django, sys; django.setup(); '
+                f'print(*(name in sys.modules for name in {deferred!r}))'
+            )],
+            cwd=settings.BASE_DIR, stdout=subprocess.PIPE,
+            universal_newlines=True, check=True,
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'yatube.settings'},
+        )
+        self.assertEqual(result.stdout.split(), ['False'] * len(deferred))
+
+
+class LiveUpdatesTest(SimpleTestCase):
+    def setUp(self):
+        self.broker = pubsub.LocalBackend()
+        pubsub._broker = self.broker
+
+    def tearDown(self):
+        pubsub._broker = None
+
+    def run_stream(self, feed):
+        sent = []
+
+        async def scenario():
+            disconnected = asyncio.Event()
+
+            async def receive():
+                await disconnected.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                sent.append(message)
+
+            scope = {
+                'type': 'http',
+                'path': '/events/',
+                'query_string': f'feed={feed}'.encode(),
+                'headers': [],
+            }
+            stream = asyncio.ensure_future(live_updates(scope, receive, send))
+            await asyncio.sleep(0.01)
+            self.broker.publish(*pubsub.post_event(1, 2, 'Author', 'cats'))
+            self.broker.publish(*pubsub.post_event(3, 4, 'Other', 'dogs'))
+            await asyncio.sleep(0.01)
+            disconnected.set()
+            await stream
+
+        asyncio.run(scenario())
+        return sent
+
+    def test_group_stream_receives_only_its_posts(self):
+        """Поток группы получает только посты этой группы."""
+        sent = self.run_stream('group:cats')
+        self.assertEqual(sent[0]['status'], 200)
+        bodies = [message['body'] for message in sent[1:]]
+        self.assertEqual(len(bodies), 1)
+        self.assertIn(b'"id": 1', bodies[0])
+        self.assertEqual(self.broker.subscribers, {})
+
+    def test_unknown_feed_is_rejected(self):
+        """Неизвестная лента отклоняется без подписки."""
+        sent = self.run_stream('secret')
+        self.assertEqual(sent[0]['status'], 403)
+
+    @override_settings(LIVE_UPDATES_POLL_INTERVAL=0)
+    def test_polling_survives_database_errors(self):
+        """Ошибка базы не останавливает опрос новых постов."""
+        results = [DatabaseError('gone away'), 0, [{
+            'pk': 1, 'author_id': 2, 'author__username': 'Author',
+            'group__slug': 'cats',
+        }]]
+
+        async def run_in_db_thread(func, *args):
+            result = results.pop(0) if results else []
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        async def scenario():
+            broker = pubsub.PollingBackend()
+            queue = broker.subscribe(['group:cats'])
+            message = await asyncio.wait_for(queue.get(), 1)
+            broker.unsubscribe(queue)
+            await broker.poller
+            return message
+
+        with patch.object(pubsub, 'run_in_db_thread', run_in_db_thread), \
+                self.assertLogs('core.pubsub', 'WARNING'):
+            message = asyncio.run(scenario())
+        self.assertEqual(message['id'], 1)
+
+
+class WsgiBridgeTest(SimpleTestCase):
+    def call(self, application, scope, body=b''):
+        sent = []
+
+        async def scenario():
+            async def receive():
+                return {'type': 'http.request', 'body': body}
+
+            async def send(message):
+                sent.append(message)
+
+            await WsgiBridge(application, threads=2)(scope, receive, send)
+
+        asyncio.run(scenario())
+        return sent
+
+    def test_request_is_translated_to_environ(self):
+        """Запрос ASGI доходит до WSGI-приложения с путём, строкой и телом."""
+        seen = {}
+
+        def application(environ, start_response):
+            seen.update(environ)
+            seen['body'] = environ['wsgi.input'].read()
+            start_response('201 Created', [('Content-Type', 'text/plain')])
+            return [b'first', b'second']
+
+        sent = self.call(application, {
+            'type': 'http',
+            'method': 'POST',
+            'path': '/группы/',
+            'query_string': b'page=2',
+            'headers': [
+                (b'content-type', b'text/plain'),
+                (b'x-forwarded-for', b'10.0.0.1'),
+                (b'accept', b'text/html'),
+                (b'accept', b'*/*'),
+                (b'cookie', b'sessionid=abc'),
+                (b'cookie', b'csrftoken=xyz'),
+            ],
+        }, body=b'payload')
+        self.assertEqual(seen['REQUEST_METHOD'], 'POST')
+        self.assertEqual(
+            seen['PATH_INFO'].encode('latin-1').decode(), '/группы/')
+        self.assertEqual(seen['QUERY_STRING'], 'page=2')
+        self.assertEqual(seen['CONTENT_TYPE'], 'text/plain')
+        self.assertEqual(seen['HTTP_X_FORWARDED_FOR'], '10.0.0.1')
+        self.assertEqual(seen['HTTP_ACCEPT'], 'text/html,*/*')
+        self.assertEqual(
+            seen['HTTP_COOKIE'], 'sessionid=abc; csrftoken=xyz')
+        self.assertEqual(seen['body'], b'payload')
+        self.assertEqual(sent[0]['status'], 201)
+        self.assertIn((b'content-type', b'text/plain'), sent[0]['headers'])
+        self.assertEqual(
+            b''.join(message.get('body', b'') for message in sent[1:]),
+            b'firstsecond',
+        )
+        self.assertFalse(sent[-1].get('more_body'))
+
+    def test_django_pages_are_served(self):
+        """Через мост отдаются обычные страницы Django."""
+        sent = self.call(get_wsgi_application(), {
+            'type': 'http',
+            'method': 'GET',
+            'path': reverse('about:author'),
+            'query_string': b'',
+            'headers': [(b'host', b'testserver')],
+        })
+        self.assertEqual(sent[0]['status'], 200)
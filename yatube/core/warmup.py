@@ -0,0 +1,116 @@
+import io
+import logging
+import os
+import sys
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.template.loader import get_template
+from django.urls import get_resolver, reverse
+
+from posts import urls as posts_urls
+
+logger = logging.getLogger(__name__)
+
+
+def warm_templates():
+    """Компилирует все шаблоны из ``TEMPLATES_DIR`` заранее.
+
+    С кэширующим загрузчиком скомпилированные шаблоны остаются в памяти
+    процесса, и первые запросы не тратят время на разбор шаблонов.
+    """
+    compiled = 0
+    for root, _, files in os.walk(settings.TEMPLATES_DIR):
+        for filename in files:
+            if not filename.endswith('.html'):
+                continue
+            name = os.path.relpath(
+                os.path.join(root, filename), settings.TEMPLATES_DIR)
+            get_template(name.replace(os.sep, '/'))
+            compiled += 1
+    return compiled
+
+
+def warm_urls():
+    """Компилирует регулярные выражения URL и словари для reverse()."""
+    resolver = get_resolver()
+    resolver.reverse_dict
+    for namespace in resolver.namespace_dict:
+        resolver.namespace_dict[namespace][1].reverse_dict
+    for pattern in posts_urls.urlpatterns:
+        pattern.pattern.regex
+    return len(posts_urls.urlpatterns)
+
+
+def warm_connections():
+    """Открывает соединения со всеми базами."""
+    for connection in connections.all():
+        connection.ensure_connection()
+
+
+def page_environ(url):
+    """WSGI environ анонимного GET-запроса к ``url`` на ``WARMUP_HOST``.
+
+    Собирается вручную, чтобы не загружать в воркер ``django.test``.
+    """
+    secure = settings.WARMUP_SCHEME == 'https'
+    return {
+        'REQUEST_METHOD': 'GET',
+        'SCRIPT_NAME': '',
+        'PATH_INFO': url,
+        'QUERY_STRING': '',
+        'SERVER_NAME': settings.WARMUP_HOST,
+        'SERVER_PORT': '443' if secure else '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': settings.WARMUP_HOST,
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': settings.WARMUP_SCHEME,
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': False,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+
+
+def warm_pages(application):
+    """Прогоняет анонимные запросы к страницам из кэша через приложение.
+
+    Ответы попадают в кэш страниц (``cache_page`` ленты и кэш анонимных
+    страниц), а заодно загружаются middleware, шаблонные теги и метаданные
+    моделей. Ключи кэша страниц включают схему и хост, поэтому без
+    ``WARMUP_HOST`` страницы не прогреваются. Возвращает статусы ответов.
+    """
+    statuses = {}
+    if not settings.WARMUP_HOST:
+        return statuses
+    for url in map(reverse, settings.WARMUP_URL_NAMES):
+        statuses[url] = []
+
+        def start_response(status, headers, exc_info=None):
+            statuses[url].append(status)
+
+        response = application(page_environ(url), start_response)
+        for _ in response:
+            pass
+        response.close()
+    return {url: status[0] for url, status in statuses.items()}
+
+
+def warm_up(application):
+    """Прогрев процесса перед приёмом запросов.
+
+    Безопасен до fork: в конце закрывает соединения с базой, чтобы
+    воркеры не делили сокеты мастера. Кэш в памяти (LocMemCache) при fork
+    копируется в воркеры вместе с прогретыми страницами. После fork стоит
+    вызвать ``warm_connections`` (хук ``post_fork`` в gunicorn).
+    """
+    warm_templates()
+    warm_urls()
+    try:
+        warm_connections()
+        warm_pages(application)
+    except DatabaseError:
+        logger.warning('База недоступна, страницы не прогреты', exc_info=True)
+    finally:
+        connections.close_all()
@@ -0,0 +1,124 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from django.shortcuts import get_object_or_404
+
+from .models import (
+    ArchivedComment, ArchivedPost, Comment, Follow, FollowSuggestion, Post,
+)
+
+User = get_user_model()
+
+
+def get_post_or_archived(post_id, queryset=Post.objects):
+    """Пост из горячей таблицы, а если он перенесён — из архива.
+
+    Возвращает пару (пост, из архива ли он) или 404.
+    """
+    post = queryset.filter(pk=post_id).first()
+    if post is not None:
+        return post, False
+    archived = ArchivedPost.objects.select_related('author', 'group')
+    return get_object_or_404(archived, pk=post_id), True
+
+
+def archive_batch(before, batch_size):
+    """Переносит порцию постов и их комментарии в архив одной транзакцией.
+
+    Посты и комментарии блокируются при выборке, а удаляются ровно те
+    строки, что скопированы, поэтому правка поста или новый комментарий
+    не пропадут, не попав в архив. Возвращает число перенесённых постов.
+    """
+    with transaction.atomic():
+        posts = list(
+            Post.objects.select_for_update()
+            .filter(pub_date__lt=before)
+            .order_by('pub_date', 'pk')[:batch_size]
+        )
+        if not posts:
+            return 0
+        post_ids = [post.pk for post in posts]
+        comments = list(
+            Comment.objects.select_for_update().filter(post_id__in=post_ids))
+        ArchivedPost.objects.bulk_create(
+            ArchivedPost(
+                id=post.pk, text=post.text, text_html=post.text_html,
+                pub_date=post.pub_date, author_id=post.author_id,
+                group_id=post.group_id, image=post.image.name,
+            )
+            for post in posts
+        )
+        ArchivedComment.objects.bulk_create(
+            ArchivedComment(
+                id=comment.pk, text=comment.text, created=comment.created,
+                post_id=comment.post_id, author_id=comment.author_id,
+            )
+            for comment in comments
+        )
+        # Удаление через ORM, чтобы сигналы обновили счётчики, статистику
+        # групп и сбросили кэши страниц.
+        Comment.objects.filter(
+            pk__in=[comment.pk for comment in comments]).delete()
+        Post.objects.filter(pk__in=post_ids).delete()
+    return len(posts)
+
+
+def archive_posts(before, batch_size, pause=0.0):
+    """Переносит в архив посты, опубликованные раньше ``before``.
+
+    Каждая порция — отдельная транзакция, поэтому прерванный перенос
+    продолжается повторным запуском. Возвращает число перенесённых постов.
+    """
+    archived = 0
+    while True:
+        moved = archive_batch(before, batch_size)
+        if not moved:
+            return archived
+        archived += moved
+        if pause:
+            time.sleep(pause)
+
+
+def delete_in_batches(queryset, batch_size, pause=0.0):
+    """Удаляет записи выборки порциями по ``batch_size`` первичных ключей.
+
+    Возвращает число удалённых записей вместе с каскадными.
+    """
+    model = queryset.model
+    deleted = 0
+    while True:
+        pks = list(queryset.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        deleted += model.objects.filter(pk__in=pks).delete()[0]
+        if pause:
+            time.sleep(pause)
+
+
+def purge_user(user, batch_size, pause=0.0):
+    """Удаляет пользователя со всеми его данными порциями.
+
+    Сначала пользователь деактивируется и больше не может войти, затем
+    его данные удаляются небольшими транзакциями — от зависимых записей
+    к постам, чтобы каскад при удалении самого пользователя был пустым.
+    Прерванное удаление продолжается повторным запуском.
+    Возвращает число удалённых записей.
+    """
+    if user.is_active:
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        user.is_active = False
+    querysets = (
+        Comment.objects.filter(Q(author=user) | Q(post__author=user)),
+        ArchivedComment.objects.filter(Q(author=user) | Q(post__author=user)),
+        Post.objects.filter(author=user),
+        ArchivedPost.objects.filter(author=user),
+        Follow.objects.filter(Q(user=user) | Q(author=user)),
+        FollowSuggestion.objects.filter(Q(user=user) | Q(author=user)),
+    )
+    deleted = sum(
+        delete_in_batches(queryset, batch_size, pause)
+        for queryset in querysets
+    )
+    return deleted + user.delete()[0]
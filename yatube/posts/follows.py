@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Follow
+
+User = get_user_model()
+
+
+def follow_state_key(user_id):
+    return f'follows:{user_id}'
+
+
+def followed_author_ids(user):
+    """Множество id авторов, на которых подписан ``user``.
+
+    Считается одним запросом и хранится в кэше до изменения подписок
+    пользователя (см. ``posts.signals``). Для анонима — пустое множество.
+    """
+    if not user.is_authenticated:
+        return frozenset()
+    key = follow_state_key(user.pk)
+    author_ids = cache.get(key)
+    if author_ids is None:
+        author_ids = frozenset(
+            Follow.objects.filter(user=user).values_list(
+                'author_id', flat=True)
+        )
+        cache.set(key, author_ids, settings.FOLLOW_STATE_TIMEOUT)
+    return author_ids
+
+
+def follow_authors(user, usernames):
+    """Подписывает ``user`` на авторов и возвращает число новых подписок.
+
+    Существующие подписки проверяются в базе, а не по кэшу
+    ``followed_author_ids``: кэш может отставать, а повторная отправка
+    формы не должна создавать дублей.
+    """
+    authors = User.objects.filter(username__in=usernames).exclude(
+        pk=user.pk).only('username')
+    created = 0
+    # Поштучно, чтобы сработали сигналы подписок (кэши, CDN).
+    with transaction.atomic():
+        for author in authors:
+            _, is_new = Follow.objects.get_or_create(user=user, author=author)
+            created += is_new
+    return created
+
+
+def unfollow_authors(user, usernames):
+    """Отписывает ``user`` от авторов и возвращает число удалённых подписок."""
+    deleted, _ = Follow.objects.filter(
+        user=user, author__username__in=usernames).delete()
+    return deleted
@@ -0,0 +1,137 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Q
+from django.shortcuts import get_object_or_404
+
+from .models import Group, GroupAuthorStats, GroupStats, Post
+
+
+def group_cache_key(slug):
+    return f'group:{slug}'
+
+
+def top_authors_key(group_id):
+    return f'group_top_authors:{group_id}'
+
+
+def group_by_slug(slug):
+    """Группа по slug из кэша, при промахе — из базы или 404.
+
+    Кэш сбрасывается сигналами при изменении и удалении группы
+    (см. ``posts.signals``).
+    """
+    key = group_cache_key(slug)
+    group = cache.get(key)
+    if group is None:
+        group = get_object_or_404(Group, slug=slug)
+        cache.set(key, group, settings.GROUP_CACHE_TIMEOUT)
+    return group
+
+
+def increment(queryset, **create):
+    """Увеличивает счётчик post_count строки или создаёт её со значением 1.
+
+    Если строку между UPDATE и INSERT создал параллельный запрос,
+    уникальный ключ не даст вставить дубль, и счётчик увеличивается снова.
+    """
+    if queryset.update(post_count=F('post_count') + 1):
+        return
+    try:
+        with transaction.atomic():
+            queryset.model.objects.create(post_count=1, **create)
+    except IntegrityError:
+        queryset.update(post_count=F('post_count') + 1)
+
+
+def add_group_post(group_id, author_id, pub_date):
+    """Учитывает новый пост группы в её статистике."""
+    increment(
+        GroupStats.objects.filter(pk=group_id),
+        group_id=group_id, last_activity=pub_date,
+    )
+    GroupStats.objects.filter(pk=group_id).filter(
+        Q(last_activity__lt=pub_date) | Q(last_activity__isnull=True)
+    ).update(last_activity=pub_date)
+    increment(
+        GroupAuthorStats.objects.filter(
+            group_id=group_id, author_id=author_id),
+        group_id=group_id, author_id=author_id,
+    )
+    cache.delete(top_authors_key(group_id))
+
+
+def remove_group_post(group_id, author_id, pub_date):
+    """Убирает удалённый или перенесённый пост из статистики группы.
+
+    Дата последней публикации пересчитывается, только если уходит
+    самый свежий пост группы.
+    """
+    GroupStats.objects.filter(pk=group_id, post_count__gt=0).update(
+        post_count=F('post_count') - 1)
+    if GroupStats.objects.filter(pk=group_id, last_activity=pub_date).exists():
+        latest = Post.objects.filter(group_id=group_id).aggregate(
+            latest=Max('pub_date'))['latest']
+        GroupStats.objects.filter(pk=group_id).update(last_activity=latest)
+    authors = GroupAuthorStats.objects.filter(
+        group_id=group_id, author_id=author_id)
+    authors.filter(post_count__gt=0).update(post_count=F('post_count') - 1)
+    authors.filter(post_count=0).delete()
+    cache.delete(top_authors_key(group_id))
+
+
+def top_authors(group_ids):
+    """Самые активные авторы групп: ``{group_id: [GroupAuthorStats]}``.
+
+    Списки берутся из кэша одним запросом, при промахе каждая группа
+    читается по индексу ``(group, -post_count)``.
+    """
+    keys = {top_authors_key(group_id): group_id for group_id in group_ids}
+    cached = cache.get_many(keys)
+    result = {keys[key]: authors for key, authors in cached.items()}
+    missing = {}
+    for key, group_id in keys.items():
+        if group_id in result:
+            continue
+        authors = list(
+            GroupAuthorStats.objects.filter(group_id=group_id)
+            .select_related('author')
+            .only('post_count', 'author__username', 'author__first_name',
+                  'author__last_name')
+            .order_by('-post_count', 'author_id')
+            [:settings.GROUP_TOP_AUTHORS]
+        )
+        result[group_id] = missing[key] = authors
+    cache.set_many(missing, settings.GROUP_CACHE_TIMEOUT)
+    return result
+
+
+def rebuild_group_stats():
+    """Пересчитывает статистику всех групп по постам.
+
+    Нужен после массовых изменений в обход сигналов (``bulk_create``,
+    ``QuerySet.update``). Возвращает число групп с постами.
+    """
+    posts = Post.objects.filter(group__isnull=False).order_by()
+    groups = posts.values('group').annotate(
+        post_count=Count('pk'), last_activity=Max('pub_date'))
+    authors = posts.values('group', 'author').annotate(post_count=Count('pk'))
+    group_ids = list(Group.objects.values_list('pk', flat=True))
+    with transaction.atomic():
+        GroupAuthorStats.objects.all().delete()
+        GroupStats.objects.all().delete()
+        stats = {
+            group_id: GroupStats(group_id=group_id) for group_id in group_ids
+        }
+        for row in groups:
+            stats[row['group']].post_count = row['post_count']
+            stats[row['group']].last_activity = row['last_activity']
+        GroupStats.objects.bulk_create(stats.values(), batch_size=500)
+        GroupAuthorStats.objects.bulk_create(
+            (GroupAuthorStats(group_id=row['group'], author_id=row['author'],
+                              post_count=row['post_count'])
+             for row in authors),
+            batch_size=500,
+        )
+    cache.delete_many([top_authors_key(group_id) for group_id in group_ids])
+    return len(groups)
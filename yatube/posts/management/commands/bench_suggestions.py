@@ -0,0 +1,48 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.suggestions import FollowGraph
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет построение графа подписок и расчёт рекомендаций на '
+        'синтетическом графе.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--edges', type=int, default=1_000_000)
+        parser.add_argument('--users', type=int, default=100_000)
+        parser.add_argument(
+            '--sample',
+            type=int,
+            default=1000,
+            help='Для скольких пользователей считать рекомендации.',
+        )
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        users = options['users']
+        # Популярность авторов распределена по степенному закону.
+        authors = [int(users * rng.paretovariate(1.2)) % users
+                   for _ in range(users)]
+        started = time.perf_counter()
+        graph = FollowGraph(
+            (rng.randrange(users), rng.choice(authors))
+            for _ in range(options['edges'])
+        )
+        built = time.perf_counter() - started
+        sample = rng.sample(sorted(graph.following), options['sample'])
+        started = time.perf_counter()
+        for user_id in sample:
+            graph.suggest(user_id)
+        per_user = (time.perf_counter() - started) / len(sample)
+        self.stdout.write(
+            f'Граф из {options["edges"]} рёбер построен за {built:.1f} с; '
+            f'рекомендации: {per_user * 1000:.2f} мс на пользователя, '
+            f'полный пересчёт {len(graph.following)} пользователей '
+            f'≈ {per_user * len(graph.following):.0f} с'
+        )
@@ -0,0 +1,62 @@
+import io
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.management.base import BaseCommand
+from PIL import Image
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+
+from core.storage import InMemoryStorage
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает загрузку картинки поста и построение её миниатюры '
+        'с хранением на диске и в памяти (InMemoryStorage).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=20)
+        parser.add_argument('--size', default='1920x1080')
+
+    def handle(self, *args, **options):
+        width, height = (int(side) for side in options['size'].split('x'))
+        buffer = io.BytesIO()
+        Image.new('RGB', (width, height), 'teal').save(buffer, 'JPEG')
+        source = buffer.getvalue()
+        with tempfile.TemporaryDirectory() as directory:
+            storages = {
+                'диск': FileSystemStorage(location=directory),
+                'память': InMemoryStorage(namespace='bench'),
+            }
+            for label, storage in storages.items():
+                upload, render = self.measure(
+                    storage, source, options['rounds'])
+                self.stdout.write(
+                    f'{label}: загрузка {upload * 1000:.2f} мс, '
+                    f'миниатюра {render * 1000:.2f} мс'
+                )
+            storages['память'].clear()
+
+    def measure(self, storage, source, rounds):
+        # Те же шаги, что у get_thumbnail, но без записи в kvstore (базу).
+        options = dict(
+            default.backend.default_options, crop='right', upscale=True)
+        upload = render = 0
+        for number in range(rounds):
+            started = time.perf_counter()
+            name = storage.save(f'posts/{number}.jpg', ContentFile(source))
+            upload += time.perf_counter() - started
+            started = time.perf_counter()
+            image = default.engine.get_image(ImageFile(name, storage))
+            options['image_info'] = default.engine.get_image_info(image)
+            default.backend._create_thumbnail(
+                image, settings.POST_THUMBNAIL, options,
+                ImageFile(f'cache/{number}.jpg', storage),
+            )
+            render += time.perf_counter() - started
+        return upload / rounds, render / rounds
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts.groups import rebuild_group_stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает статистику групп (число постов, последняя '
+        'публикация, активные авторы) после изменений в обход сигналов.'
+    )
+
+    def handle(self, *args, **options):
+        groups = rebuild_group_stats()
+        self.stdout.write(f'Пересчитано групп с постами: {groups}')
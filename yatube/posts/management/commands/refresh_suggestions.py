@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.suggestions import refresh_all_suggestions
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации подписок для всех пользователей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        users, stored = refresh_all_suggestions(options['batch_size'])
+        self.stdout.write(
+            f'Пользователей: {users}, рекомендаций: {stored}, '
+            f'{time.perf_counter() - started:.1f} с'
+        )
@@ -0,0 +1,44 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from posts.models import Post, TrendingPost
+from posts.trending import update_post_score
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рейтинг популярной ленты для постов с недавними '
+        'комментариями или комментариями, вышедшими из окна, и удаляет '
+        'из неё устаревшие посты.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=30,
+            help='Посты старше этого срока убираются из ленты.',
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        since = now - timedelta(hours=settings.TRENDING_WINDOW_HOURS)
+        oldest = now - timedelta(days=options['days'])
+        stale, _ = TrendingPost.objects.filter(
+            post__pub_date__lt=oldest).delete()
+        # Посты с ненулевым счётчиком пересчитываются, чтобы вышедшие из окна
+        # комментарии перестали завышать их рейтинг.
+        active = Post.objects.filter(pub_date__gte=oldest).filter(
+            Q(pub_date__gte=since) | Q(comment__created__gte=since)
+            | Q(trending__comments__gt=0)
+        ).distinct()
+        updated = 0
+        for post in active.iterator():
+            update_post_score(post)
+            updated += 1
+        self.stdout.write(
+            f'Пересчитано постов: {updated}, удалено устаревших: {stale}')
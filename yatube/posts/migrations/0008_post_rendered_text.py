@@ -0,0 +1,38 @@
+# Generated by Django 2.2.16 on 2026-10-19 14:01
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils.html import linebreaks
+from django.utils.text import Truncator
+
+
+def render_text(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    for post in Post.objects.only('pk', 'text').iterator():
+        text_html = linebreaks(post.text, autoescape=True)
+        Post.objects.filter(pk=post.pk).update(
+            text_html=text_html,
+            excerpt_html=Truncator(text_html).chars(
+                settings.POST_EXCERPT_LENGTH, html=True),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_comment_post_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='Анонс поста в HTML'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='Текст поста в HTML'),
+        ),
+        migrations.RunPython(render_text, migrations.RunPython.noop),
+    ]
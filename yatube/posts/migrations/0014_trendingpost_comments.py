@@ -0,0 +1,29 @@
+# Generated by Django 2.2.16 on 2026-10-19 14:37
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_comments(apps, schema_editor):
+    # Все комментарии, а не только оконные: так первый refresh_trending
+    # пересчитает и рейтинги, завышенные уже вышедшими из окна комментариями.
+    TrendingPost = apps.get_model('posts', 'TrendingPost')
+    rows = TrendingPost.objects.annotate(total=Count('post__comment'))
+    for row in rows.iterator():
+        TrendingPost.objects.filter(pk=row.pk).update(comments=row.total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_model_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trendingpost',
+            name='comments',
+            field=models.PositiveIntegerField(default=0, verbose_name='Комментариев за окно'),
+        ),
+        migrations.RunPython(count_comments, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,9 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models.base import DEFERRED
+from django.utils.html import linebreaks
+from django.utils.text import Truncator
 
 User = get_user_model()
 
@@ -46,6 +50,16 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True,
     )
+    text_html = models.TextField(
+        'Текст поста в HTML',
+        blank=True,
+        editable=False,
+    )
+    excerpt_html = models.TextField(
+        'Анонс поста в HTML',
+        blank=True,
+        editable=False,
+    )
 
     class Meta:
         ordering = ('-pub_date',)
@@ -55,6 +69,30 @@ class Post(models.Model):
     def __str__(self):
         return self.text[:15]
 
+    def render_text(self):
+        """Заранее готовит HTML текста и анонса для шаблонов."""
+        self.text_html = linebreaks(self.text, autoescape=True)
+        self.excerpt_html = Truncator(self.text_html).chars(
+            settings.POST_EXCERPT_LENGTH, html=True)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'text' in update_fields:
+            self.render_text()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {
+                    'text_html', 'excerpt_html'}
+        super().save(*args, **kwargs)
+        self._loaded_group_id = self.group_id
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Группа на момент загрузки: по ней сигналы замечают перенос поста
+        # в другую группу без лишнего запроса.
+        instance._loaded_group_id = instance.__dict__.get('group_id', DEFERRED)
+        return instance
+
 
 class Comment(models.Model):
     text = models.TextField(
@@ -83,6 +121,12 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ('-created',)
+        indexes = (
+            models.Index(
+                fields=('post', '-created'),
+                name='comment_post_created_idx',
+            ),
+        )
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
 
@@ -102,4 +146,183 @@ class Follow(models.Model):
     )
 
     class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author'),
+                name='unique_follow',
+            ),
+        )
         verbose_name_plural = 'Подписки'
+
+
+class TrendingPost(models.Model):
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending',
+        verbose_name='Пост',
+    )
+    score = models.FloatField('Рейтинг')
+    comments = models.PositiveIntegerField(
+        'Комментариев за окно',
+        default=0,
+    )
+    updated = models.DateTimeField('Дата пересчёта', auto_now=True)
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('-score', '-post'),
+                name='trending_score_idx',
+            ),
+        )
+        verbose_name = 'Популярный пост'
+        verbose_name_plural = 'Популярные посты'
+
+
+class FollowSuggestion(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follow_suggestions',
+        verbose_name='Пользователь',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Рекомендуемый автор',
+    )
+    score = models.FloatField('Вес')
+
+    class Meta:
+        ordering = ('-score',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author'),
+                name='unique_follow_suggestion',
+            ),
+        )
+        verbose_name = 'Рекомендация подписки'
+        verbose_name_plural = 'Рекомендации подписок'
+
+
+class GroupStats(models.Model):
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Группа',
+    )
+    post_count = models.PositiveIntegerField('Число постов', default=0)
+    last_activity = models.DateTimeField(
+        'Последняя публикация',
+        blank=True,
+        null=True,
+    )
+
+    class Meta:
+        verbose_name = 'Статистика группы'
+        verbose_name_plural = 'Статистика групп'
+
+
+class GroupAuthorStats(models.Model):
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='author_stats',
+        verbose_name='Группа',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор',
+    )
+    post_count = models.PositiveIntegerField('Число постов', default=0)
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('group', 'author'),
+                name='unique_group_author_stats',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('group', '-post_count'),
+                name='group_author_count_idx',
+            ),
+        )
+        verbose_name = 'Автор группы'
+        verbose_name_plural = 'Авторы групп'
+
+
+class ArchivedPost(models.Model):
+    """Пост, перенесённый из горячей таблицы командой archive_posts.
+
+    Сохраняет id исходного поста, поэтому его адрес не меняется.
+    """
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField('Текст поста')
+    text_html = models.TextField('Текст поста в HTML', blank=True)
+    pub_date = models.DateTimeField('Дата публикации')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+        verbose_name='Автор',
+    )
+    group = models.ForeignKey(
+        Group,
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='archived_posts',
+        verbose_name='Группа',
+    )
+    image = models.ImageField(
+        'Картинка',
+        upload_to='posts/',
+        blank=True,
+    )
+    archived = models.DateTimeField('Дата архивации', auto_now_add=True)
+
+    class Meta:
+        ordering = ('-pub_date',)
+        verbose_name = 'Архивный пост'
+        verbose_name_plural = 'Архивные посты'
+
+    def __str__(self):
+        return self.text[:15]
+
+
+class ArchivedComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField('Текст комментария')
+    created = models.DateTimeField('Дата публикации')
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comment',
+        verbose_name='Пост',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments',
+        verbose_name='Автор',
+    )
+
+    class Meta:
+        ordering = ('-created',)
+        indexes = (
+            models.Index(
+                fields=('post', '-created'),
+                name='archived_comment_created_idx',
+            ),
+        )
+        verbose_name = 'Архивный комментарий'
+        verbose_name_plural = 'Архивные комментарии'
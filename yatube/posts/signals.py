@@ -0,0 +1,150 @@
+from django.core.cache import cache
+from django.db.models.base import DEFERRED
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.edge import purge_surrogate_keys
+from core.middleware import invalidate_anonymous_pages
+
+from .follows import follow_state_key
+from .groups import add_group_post, group_cache_key, remove_group_post
+from .models import Comment, Follow, Group, GroupStats, Post
+from .utils import post_count_key, post_surrogate_keys
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_pages(sender, **kwargs):
+    invalidate_anonymous_pages()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def purge_post(sender, instance, **kwargs):
+    purge_surrogate_keys(*post_surrogate_keys(instance))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def purge_group(sender, instance, **kwargs):
+    purge_surrogate_keys(f'group-{instance.slug}', 'groups')
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def purge_comment(sender, instance, **kwargs):
+    if instance.post_id:
+        purge_surrogate_keys(f'post-{instance.post_id}')
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def purge_follow(sender, instance, **kwargs):
+    purge_surrogate_keys(f'author-{instance.author.username}')
+
+
+def bump_count(key, delta):
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        # Счётчика ещё нет в кэше, его посчитает следующий запрос.
+        pass
+
+
+def bump_post_counts(post, delta):
+    bump_count(post_count_key('all'), delta)
+    bump_count(post_count_key('author', post.author_id), delta)
+    if post.group_id:
+        bump_count(post_count_key('group', post.group_id), delta)
+    # Счётчики ленты подписок не сбрасываются у каждого подписчика: они
+    # живут FOLLOW_COUNT_TIMEOUT секунд.
+
+
+@receiver(pre_save, sender=Post)
+def remember_group(sender, instance, **kwargs):
+    instance._previous_group_id = None
+    if instance._state.adding:
+        return
+    loaded = getattr(instance, '_loaded_group_id', DEFERRED)
+    if loaded is DEFERRED:
+        loaded = Post.objects.filter(
+            pk=instance.pk).values_list('group_id', flat=True).first()
+    instance._previous_group_id = loaded
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, **kwargs):
+    if created:
+        bump_post_counts(instance, 1)
+        if instance.group_id:
+            add_group_post(
+                instance.group_id, instance.author_id, instance.pub_date)
+        return
+    previous_group_id = getattr(instance, '_previous_group_id', None)
+    if previous_group_id != instance.group_id:
+        if previous_group_id:
+            bump_count(post_count_key('group', previous_group_id), -1)
+            remove_group_post(
+                previous_group_id, instance.author_id, instance.pub_date)
+        if instance.group_id:
+            bump_count(post_count_key('group', instance.group_id), 1)
+            add_group_post(
+                instance.group_id, instance.author_id, instance.pub_date)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    bump_post_counts(instance, -1)
+    if instance.group_id:
+        remove_group_post(
+            instance.group_id, instance.author_id, instance.pub_date)
+
+
+@receiver(post_save, sender=Group)
+def create_group_stats(sender, instance, created, **kwargs):
+    if created:
+        GroupStats.objects.get_or_create(group=instance)
+
+
+@receiver(pre_save, sender=Group)
+def remember_slug(sender, instance, **kwargs):
+    instance._previous_slug = None
+    if not instance._state.adding:
+        instance._previous_slug = Group.objects.filter(
+            pk=instance.pk).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def reset_group_cache(sender, instance, **kwargs):
+    slugs = {instance.slug, getattr(instance, '_previous_slug', None)}
+    cache.delete_many(
+        [group_cache_key(slug) for slug in slugs if slug is not None])
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def reset_follow_count(sender, instance, **kwargs):
+    cache.delete(post_count_key('follow', instance.user_id))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def reset_follow_state(sender, instance, **kwargs):
+    cache.delete(follow_state_key(instance.user_id))
+
+
+@receiver(post_save, sender=Post)
+def publish_new_post(sender, instance, created, **kwargs):
+    # Брокер тянет за собой asyncio, он нужен только при первом новом посте.
+    from core.pubsub import get_broker, post_event
+
+    if created:
+        get_broker().publish(*post_event(
+            instance.pk, instance.author_id, instance.author.username,
+            instance.group.slug if instance.group_id else None,
+        ))
@@ -0,0 +1,128 @@
+import heapq
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+
+from .models import Follow, FollowSuggestion
+
+FRIENDS_OF_FRIENDS_WEIGHT = 1.0
+CO_FOLLOWED_WEIGHT = 1.0
+# Идентификаторов в одном IN: меньше лимита переменных старых SQLite.
+IN_CHUNK_SIZE = 500
+
+
+def chunked(ids):
+    ids = list(ids)
+    for start in range(0, len(ids), IN_CHUNK_SIZE):
+        yield ids[start:start + IN_CHUNK_SIZE]
+
+
+class FollowGraph:
+    """Граф подписок в виде списков смежности в обе стороны."""
+
+    def __init__(self, edges=()):
+        self.following = defaultdict(set)
+        self.followers = defaultdict(set)
+        # Полное число подписчиков для авторов, чьи читатели загружены
+        # выборкой; для остальных оно равно len(followers[author]).
+        self.follower_counts = {}
+        for user_id, author_id in edges:
+            self.add(user_id, author_id)
+
+    def add(self, user_id, author_id):
+        self.following[user_id].add(author_id)
+        self.followers[author_id].add(user_id)
+
+    def suggest(self, user_id, limit=None):
+        """Авторы, на которых стоит подписаться ``user_id``, с весами.
+
+        Учитываются авторы, на которых подписаны авторы пользователя
+        (друзья друзей), и авторы, на которых подписаны читатели тех же
+        авторов (совместные подписки). Вклад читателя делится на число
+        подписчиков автора, чтобы популярные авторы не забивали выдачу.
+        """
+        limit = limit or settings.FOLLOW_SUGGESTIONS
+        sample = settings.FOLLOW_SUGGESTIONS_FOLLOWER_SAMPLE
+        mine = self.following.get(user_id, set())
+        scores = defaultdict(float)
+        for author_id in mine:
+            for candidate in self.following.get(author_id, ()):
+                scores[candidate] += FRIENDS_OF_FRIENDS_WEIGHT
+            readers = self.followers.get(author_id, ())
+            weight = CO_FOLLOWED_WEIGHT / max(
+                self.follower_counts.get(author_id, len(readers)), 1)
+            for position, reader in enumerate(readers):
+                if position >= sample:
+                    break
+                if reader == user_id:
+                    continue
+                for candidate in self.following.get(reader, ()):
+                    scores[candidate] += weight
+        scores.pop(user_id, None)
+        for author_id in mine:
+            scores.pop(author_id, None)
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+
+def neighbourhood_graph(user_id):
+    """Загружает только ту часть графа, что нужна для одного пользователя.
+
+    У каждого автора пользователя берутся только последние
+    ``FOLLOW_SUGGESTIONS_FOLLOWER_SAMPLE`` читателей, поэтому работа на
+    одну подписку не растёт с популярностью авторов. Выборка делается
+    одним запросом на порцию авторов: подписка остаётся, если она не
+    старше ``sample``-й с конца подписки того же автора.
+    """
+    sample = settings.FOLLOW_SUGGESTIONS_FOLLOWER_SAMPLE
+    edges = Follow.objects.values_list('user_id', 'author_id')
+    graph = FollowGraph(edges.filter(user_id=user_id))
+    authors = list(graph.following[user_id])
+    oldest_sampled = Follow.objects.filter(
+        author_id=OuterRef('author_id')).order_by('-pk').values('pk')
+    for chunk in chunked(authors):
+        for edge in edges.filter(user_id__in=chunk):
+            graph.add(*edge)
+        graph.follower_counts.update(
+            Follow.objects.filter(author_id__in=chunk).order_by()
+            .values_list('author_id').annotate(Count('pk'))
+        )
+        sampled = Follow.objects.filter(author_id__in=chunk).annotate(
+            oldest=Subquery(oldest_sampled[sample - 1:sample]),
+        ).filter(Q(oldest__isnull=True) | Q(pk__gte=F('oldest')))
+        for edge in sampled.values_list('user_id', 'author_id'):
+            graph.add(*edge)
+    readers = set().union(*(graph.followers[a] for a in authors)) - {user_id}
+    for chunk in chunked(readers):
+        for edge in edges.filter(user_id__in=chunk):
+            graph.add(*edge)
+    return graph
+
+
+def store_suggestions(graph, user_ids):
+    rows = [
+        FollowSuggestion(user_id=user_id, author_id=author_id, score=score)
+        for user_id in user_ids
+        for author_id, score in graph.suggest(user_id)
+    ]
+    with transaction.atomic():
+        FollowSuggestion.objects.filter(user_id__in=user_ids).delete()
+        FollowSuggestion.objects.bulk_create(rows)
+    return len(rows)
+
+
+def refresh_user_suggestions(user_id):
+    return store_suggestions(neighbourhood_graph(user_id), [user_id])
+
+
+def refresh_all_suggestions(batch_size=500):
+    """Пересчитывает рекомендации всех подписчиков порциями."""
+    graph = FollowGraph(
+        Follow.objects.values_list('user_id', 'author_id').iterator())
+    user_ids = sorted(graph.following)
+    stored = 0
+    for start in range(0, len(user_ids), batch_size):
+        stored += store_suggestions(
+            graph, user_ids[start:start + batch_size])
+    return len(user_ids), stored
@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.core.mail import send_mail
+from django.urls import reverse
+from sorl.thumbnail import get_thumbnail
+
+from tasks.queue import task
+
+from .models import Comment, Post
+from .suggestions import refresh_user_suggestions
+from .trending import update_post_score
+
+
+@task('posts.generate_thumbnail')
+def generate_thumbnail(post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None and post.image:
+        get_thumbnail(
+            post.image,
+            settings.POST_THUMBNAIL,
+            crop='right',
+            upscale=True,
+        )
+
+
+@task('posts.notify_comment')
+def notify_comment(comment_id):
+    comment = Comment.objects.select_related(
+        'author', 'post__author').filter(pk=comment_id).first()
+    if comment is None:
+        return
+    recipient = comment.post.author
+    if not recipient.email or recipient == comment.author:
+        return
+    send_mail(
+        'Новый комментарий к вашему посту',
+        f'{comment.author.username} оставил комментарий: {comment.text}\n'
+        f'{reverse("posts:post_detail", args=(comment.post_id,))}',
+        None,
+        (recipient.email,),
+    )
+
+
+@task('posts.update_trending')
+def update_trending(post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        update_post_score(post)
+
+
+@task('posts.refresh_suggestions')
+def refresh_suggestions(user_id):
+    refresh_user_suggestions(user_id)
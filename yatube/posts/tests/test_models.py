@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.test import TestCase
 
@@ -56,3 +57,28 @@ class PostModelTest(TestCase):
             with self.subTest(field=field):
                 self.assertEqual(
                     self.post._meta.get_field(field).help_text, expected_value)
+
+    def test_rendered_text_is_precomputed(self):
+        """При сохранении готовятся экранированный HTML и анонс поста."""
+        post = Post.objects.create(
+            author=self.user,
+            text='<b>Первая</b> строка\n\nВторая строка',
+        )
+        self.assertEqual(
+            post.text_html,
+            '<p>&lt;b&gt;Первая&lt;/b&gt; строка</p>\n\n<p>Вторая строка</p>',
+        )
+        self.assertEqual(post.excerpt_html, post.text_html)
+
+    def test_excerpt_is_truncated_and_updated_on_edit(self):
+        """Анонс обрезается по длине и пересчитывается при правке."""
+        post = Post.objects.create(
+            author=self.user,
+            text='слово ' * settings.POST_EXCERPT_LENGTH,
+        )
+        self.assertLess(len(post.excerpt_html), len(post.text_html))
+        self.assertTrue(post.excerpt_html.endswith('…</p>'))
+        post.text = 'Короткий текст'
+        post.save(update_fields=('text',))
+        post.refresh_from_db()
+        self.assertEqual(post.excerpt_html, '<p>Короткий текст</p>')
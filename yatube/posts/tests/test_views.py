@@ -1,25 +1,43 @@
-import shutil
-import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.models import QuerySet
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from django import forms
 
-from ..models import Follow, Comment, Group, Post
+from core.testing import InMemoryMediaMixin
+from tasks.models import Task
+
+from ..archive import archive_posts, purge_user
+from ..follows import follow_authors, follow_state_key, followed_author_ids
+from ..groups import group_by_slug, increment, rebuild_group_stats
+from ..models import (
+    ArchivedComment, ArchivedPost, Follow, Comment, Group, GroupAuthorStats,
+    GroupStats, Post, TrendingPost,
+)
+from ..suggestions import (
+    FollowGraph, neighbourhood_graph, refresh_all_suggestions,
+    refresh_user_suggestions,
+)
+from ..trending import update_post_score
 
 User = get_user_model()
 
 SECOND_PAGE_POSTS = 3
 TEST_POSTS = settings.PAGINATOR + SECOND_PAGE_POSTS
-TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
-class PostPagesTest(TestCase):
+class PostPagesTest(InMemoryMediaMixin, TestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -69,11 +87,6 @@ class PostPagesTest(TestCase):
             ): 'posts/create_and_edit_post.html',
         }
 
-    @classmethod
-    def tearDownClass(cls):
-        super().tearDownClass()
-        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
-
     def setUp(self):
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
@@ -274,3 +287,738 @@ class PaginatorViewsTest(TestCase):
                 response_2 = self.client.get((reverse_name) + '?page=2')
                 self.assertEqual(
                     len(response_2.context['page_obj']), SECOND_PAGE_POSTS)
+
+
+class CommentBatchViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый текст',
+        )
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.user, text=f'Комментарий {i}')
+            for i in range(settings.COMMENTS_PER_PAGE + SECOND_PAGE_POSTS)
+        )
+
+    def test_post_detail_shows_first_comments_batch(self):
+        """На странице поста выводится только первая порция комментариев."""
+        response = self.client.get(reverse(
+            'posts:post_detail',
+            kwargs={'post_id': self.post.id}))
+        self.assertEqual(
+            len(response.context['comments']), settings.COMMENTS_PER_PAGE)
+        self.assertIsNotNone(response.context['next_cursor'])
+
+    def test_comment_list_returns_next_batch(self):
+        """Фрагмент comment_list отдаёт оставшиеся комментарии."""
+        first = self.client.get(reverse(
+            'posts:post_detail',
+            kwargs={'post_id': self.post.id}))
+        response = self.client.get(
+            reverse('posts:comment_list', kwargs={'post_id': self.post.id}),
+            {'cursor': first.context['next_cursor']},
+        )
+        self.assertTemplateUsed(response, 'includes/comment_list.html')
+        self.assertEqual(len(response.context['comments']), SECOND_PAGE_POSTS)
+        self.assertIsNone(response.context['next_cursor'])
+        shown = {
+            comment.pk
+            for page in (first, response)
+            for comment in page.context['comments']
+        }
+        self.assertEqual(len(shown), Comment.objects.count())
+
+    def test_comment_list_out_of_range_cursor(self):
+        """Курсор за пределами дат считается недействительным."""
+        url = reverse('posts:comment_list', kwargs={'post_id': self.post.id})
+        for cursor in ('99999999999999999999-1', '1000000000000000000-1'):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(url, {'cursor': cursor})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    len(response.context['comments']),
+                    settings.COMMENTS_PER_PAGE)
+
+
+purged_keys = []
+
+
+def record_purge(keys):
+    purged_keys.extend(keys)
+
+
+@override_settings(EDGE_PURGE_BACKEND='posts.tests.test_views.record_purge')
+class EdgeCacheHeadersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый текст',
+            group=cls.group,
+        )
+
+    def setUp(self):
+        cache.clear()
+        purged_keys.clear()
+
+    def test_anonymous_pages_are_public_with_surrogate_keys(self):
+        """Анонимные страницы кэшируемы в CDN и размечены ключами."""
+        pages = {
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}):
+                'group-test-slug',
+            reverse('posts:profile', kwargs={'username': 'TestUser'}):
+                'author-TestUser',
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}):
+                f'post-{self.post.id}',
+        }
+        for url, key in pages.items():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertIn('public', response['Cache-Control'])
+                self.assertIn('s-maxage', response['Cache-Control'])
+                self.assertIn(key, response['Surrogate-Key'].split())
+
+    def test_authorized_pages_are_private(self):
+        """Страницы авторизованного пользователя не кэшируются в CDN."""
+        self.client.force_login(self.user)
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': 'TestUser'}))
+        self.assertIn('private', response['Cache-Control'])
+        self.assertNotIn('public', response['Cache-Control'])
+
+    def test_post_change_purges_related_keys(self):
+        """Изменение поста сбрасывает ключи связанных страниц."""
+        self.post.text = 'Новый текст'
+        self.post.save()
+        for key in (
+            'index', f'post-{self.post.id}', 'author-TestUser',
+            'group-test-slug',
+        ):
+            with self.subTest(key=key):
+                self.assertIn(key, purged_keys)
+
+    def test_comment_purges_post_key(self):
+        """Новый комментарий сбрасывает страницу поста."""
+        Comment.objects.create(
+            post=self.post, author=self.user, text='Комментарий')
+        self.assertEqual(purged_keys, [f'post-{self.post.id}'])
+
+
+class PostCardsQueriesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for i in range(SECOND_PAGE_POSTS):
+            Post.objects.create(
+                author=cls.user,
+                text='Очень длинный текст ' * 100,
+                group=cls.group,
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_listing_does_not_fetch_post_bodies(self):
+        """Лента выбирает только колонки карточки без текста поста."""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse(
+                'posts:group_list', kwargs={'slug': self.group.slug}))
+        for query in queries.captured_queries:
+            with self.subTest(sql=query['sql']):
+                self.assertNotIn('"posts_post"."text",', query['sql'])
+                self.assertNotIn('"auth_user"."password"', query['sql'])
+        # группа, подсчёт постов и сама страница
+        self.assertEqual(len(queries.captured_queries), 3)
+
+
+class CachedCountPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for i in range(TEST_POSTS):
+            Post.objects.create(
+                author=cls.user,
+                text='Тестовый текст',
+                group=cls.group,
+            )
+        cls.url = reverse('posts:group_list', kwargs={'slug': 'test-slug'})
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(self.url)
+        counts = [
+            query['sql'] for query in queries.captured_queries
+            if 'COUNT(*)' in query['sql']
+        ]
+        return response, counts
+
+    def test_count_query_leaves_hot_path(self):
+        """Число постов группы считается один раз и берётся из кэша."""
+        _, first = self.count_queries()
+        response, second = self.count_queries()
+        self.assertEqual(len(first), 1)
+        self.assertEqual(second, [])
+        self.assertEqual(response.context['page_obj'].paginator.count,
+                         TEST_POSTS)
+
+    def test_cached_count_follows_new_and_deleted_posts(self):
+        """Кэшированный счётчик обновляется при создании и удалении постов."""
+        self.count_queries()
+        post = Post.objects.create(
+            author=self.user, text='Новый пост', group=self.group)
+        response, counts = self.count_queries()
+        self.assertEqual(counts, [])
+        self.assertEqual(response.context['page_obj'].paginator.count,
+                         TEST_POSTS + 1)
+        post.group = None
+        post.save()
+        response, _ = self.count_queries()
+        self.assertEqual(response.context['page_obj'].paginator.count,
+                         TEST_POSTS)
+
+    def test_group_change_detected_without_extra_query(self):
+        """Перенос загруженного поста в другую группу не перечитывает пост."""
+        post = Post.objects.filter(group=self.group).first()
+        with CaptureQueriesContext(connection) as queries:
+            post.text = 'Новый текст'
+            post.save()
+        self.assertFalse(any(
+            query['sql'].startswith('SELECT') and 'posts_post' in query['sql']
+            for query in queries.captured_queries
+        ))
+        self.count_queries()
+        post.group = None
+        post.save()
+        response, _ = self.count_queries()
+        self.assertEqual(response.context['page_obj'].paginator.count,
+                         TEST_POSTS - 1)
+
+    def test_new_post_does_not_read_followers(self):
+        """Новый пост не перебирает подписчиков автора."""
+        Follow.objects.create(
+            user=User.objects.create_user(username='Reader'),
+            author=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            Post.objects.create(author=self.user, text='Текст')
+        self.assertFalse(any(
+            'posts_follow' in query['sql']
+            for query in queries.captured_queries
+        ))
+
+    def test_page_window_is_limited(self):
+        """Ссылки на страницы выводятся только вокруг текущей."""
+        Post.objects.bulk_create(
+            Post(author=self.user, text='Текст', group=self.group)
+            for _ in range(settings.PAGINATOR * 10)
+        )
+        response = self.authorized_client.get(self.url + '?page=5')
+        self.assertEqual(
+            list(response.context['page_obj'].page_window),
+            list(range(5 - settings.PAGINATOR_WINDOW,
+                       5 + settings.PAGINATOR_WINDOW + 1)),
+        )
+
+
+class TrendingViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.posts = [
+            Post.objects.create(author=cls.user, text=f'Пост {i}')
+            for i in range(TEST_POSTS)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_commented_post_ranks_first(self):
+        """Пост с комментариями поднимается на верх популярной ленты."""
+        for post in self.posts:
+            update_post_score(post)
+        hot = self.posts[0]
+        Comment.objects.bulk_create(
+            Comment(post=hot, author=self.user, text='Комментарий')
+            for _ in range(50)
+        )
+        update_post_score(hot)
+        response = self.client.get(reverse('posts:trending'))
+        self.assertEqual(response.context['posts'][0], hot)
+
+    def test_trending_cursor_pagination(self):
+        """Популярная лента листается курсором без повторов."""
+        for post in self.posts:
+            update_post_score(post)
+        first = self.client.get(reverse('posts:trending'))
+        self.assertEqual(len(first.context['posts']), settings.PAGINATOR)
+        second = self.client.get(
+            reverse('posts:trending'),
+            {'cursor': first.context['next_cursor']},
+        )
+        self.assertEqual(len(second.context['posts']), SECOND_PAGE_POSTS)
+        self.assertIsNone(second.context['next_cursor'])
+        shown = set(first.context['posts']) | set(second.context['posts'])
+        self.assertEqual(len(shown), TEST_POSTS)
+
+    def test_refresh_rescores_posts_with_expired_comments(self):
+        """Комментарии, вышедшие из окна, перестают поднимать пост."""
+        hot = self.posts[0]
+        Comment.objects.bulk_create(
+            Comment(post=hot, author=self.user, text='Комментарий')
+            for _ in range(50)
+        )
+        update_post_score(hot)
+        inflated = TrendingPost.objects.get(post=hot)
+        self.assertEqual(inflated.comments, 50)
+        Comment.objects.filter(post=hot).update(
+            created=timezone.now() - timedelta(
+                hours=settings.TRENDING_WINDOW_HOURS + 1))
+        call_command('refresh_trending', stdout=StringIO())
+        refreshed = TrendingPost.objects.get(post=hot)
+        self.assertEqual(refreshed.comments, 0)
+        self.assertLess(refreshed.score, inflated.score)
+
+    def test_comment_schedules_score_update(self):
+        """Новый комментарий ставит пересчёт рейтинга в очередь."""
+        self.client.force_login(self.user)
+        self.client.post(
+            reverse('posts:add_comment',
+                    kwargs={'post_id': self.posts[0].id}),
+            {'text': 'Комментарий'},
+        )
+        self.assertTrue(Task.objects.filter(
+            name='posts.update_trending',
+            payload__contains=f'"post_id": {self.posts[0].id}',
+        ).exists())
+        self.assertFalse(TrendingPost.objects.exists())
+
+
+class FollowSuggestionsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader, cls.friend, cls.author, cls.other = (
+            User.objects.create_user(username=name)
+            for name in ('Reader', 'Friend', 'Author', 'Other')
+        )
+        Follow.objects.create(user=cls.reader, author=cls.friend)
+        Follow.objects.create(user=cls.friend, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+
+    def test_graph_suggests_friends_of_friends_and_co_followed(self):
+        """Граф рекомендует авторов друзей и совместные подписки."""
+        graph = FollowGraph([(1, 2), (2, 3), (4, 2), (4, 5)])
+        suggested = dict(graph.suggest(1))
+        self.assertEqual(set(suggested), {3, 5})
+        self.assertNotIn(2, suggested)
+
+    @override_settings(FOLLOW_SUGGESTIONS_FOLLOWER_SAMPLE=2)
+    def test_neighbourhood_samples_followers_in_query(self):
+        """Читатели популярного автора загружаются выборкой."""
+        fans = [
+            User.objects.create_user(username=f'Fan{number}')
+            for number in range(5)
+        ]
+        for fan in fans:
+            Follow.objects.create(user=fan, author=self.friend)
+        graph = neighbourhood_graph(self.reader.pk)
+        self.assertEqual(
+            graph.followers[self.friend.pk],
+            {self.reader.pk, fans[-1].pk, fans[-2].pk},
+        )
+        self.assertEqual(graph.follower_counts[self.friend.pk], 6)
+
+    @override_settings(FOLLOW_SUGGESTIONS_FOLLOWER_SAMPLE=1)
+    def test_neighbourhood_queries_do_not_grow_with_authors(self):
+        """Граф соседей читается одними и теми же запросами порциями."""
+        for number in range(4):
+            author = User.objects.create_user(username=f'Popular{number}')
+            Follow.objects.create(user=self.reader, author=author)
+            for fan in range(3):
+                Follow.objects.create(
+                    user=User.objects.create_user(
+                        username=f'Fan{number}-{fan}'),
+                    author=author,
+                )
+        with self.assertNumQueries(5):
+            graph = neighbourhood_graph(self.reader.pk)
+        with patch('posts.suggestions.IN_CHUNK_SIZE', 2):
+            chunked = neighbourhood_graph(self.reader.pk)
+        self.assertEqual(chunked.followers, graph.followers)
+        self.assertEqual(chunked.following, graph.following)
+        for author_id in graph.following[self.reader.pk]:
+            self.assertLessEqual(len(graph.followers[author_id]), 2)
+
+    def test_suggestions_shown_on_follow_page(self):
+        """Рекомендации из пакетного пересчёта видны на странице подписок."""
+        refresh_all_suggestions()
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            [item.author for item in response.context['suggestions']],
+            [self.author],
+        )
+
+    def test_follow_refreshes_own_suggestions(self):
+        """После подписки пересчёт убирает автора из рекомендаций."""
+        refresh_user_suggestions(self.reader.pk)
+        self.client.get(reverse(
+            'posts:profile_follow', kwargs={'username': 'Author'}))
+        self.assertTrue(Task.objects.filter(
+            name='posts.refresh_suggestions').exists())
+        refresh_user_suggestions(self.reader.pk)
+        self.assertFalse(self.reader.follow_suggestions.exists())
+
+
+class FollowStateTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.authors = [
+            User.objects.create_user(username=f'Author{number}')
+            for number in range(3)
+        ]
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for author in cls.authors:
+            Post.objects.create(
+                author=author, text='Тестовый текст', group=cls.group)
+        Follow.objects.create(user=cls.reader, author=cls.authors[0])
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+
+    def test_follow_state_cached_until_follows_change(self):
+        """Подписки читателя берутся из кэша и сбрасываются при изменении."""
+        self.assertEqual(
+            followed_author_ids(self.reader), {self.authors[0].pk})
+        with self.assertNumQueries(0):
+            followed_author_ids(self.reader)
+        Follow.objects.create(user=self.reader, author=self.authors[1])
+        self.assertEqual(
+            followed_author_ids(self.reader),
+            {self.authors[0].pk, self.authors[1].pk},
+        )
+
+    def test_group_cards_show_follow_state(self):
+        """Карточки ленты группы показывают, на кого подписан читатель."""
+        response = self.client.get(
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}))
+        self.assertEqual(response.context['followed'], {self.authors[0].pk})
+        self.assertContains(response, reverse(
+            'posts:profile_unfollow', args=(self.authors[0].username,)))
+        self.assertContains(response, reverse(
+            'posts:profile_follow', args=(self.authors[1].username,)))
+
+    def test_unfollow_without_follow_keeps_others_follows(self):
+        """Отписка от чужого автора не трогает подписки других читателей."""
+        other = Client()
+        other.force_login(self.authors[1])
+        response = other.get(reverse(
+            'posts:profile_unfollow', args=(self.authors[0].username,)))
+        self.assertRedirects(response, reverse(
+            'posts:profile', args=(self.authors[0].username,)))
+        self.assertTrue(Follow.objects.filter(
+            user=self.reader, author=self.authors[0]).exists())
+
+    def test_stale_follow_state_does_not_duplicate_follows(self):
+        """Устаревший кэш подписок не приводит к дублям в базе."""
+        cache.set(follow_state_key(self.reader.pk), frozenset())
+        self.assertEqual(
+            follow_authors(self.reader, [self.authors[0].username]), 0)
+        self.client.get(reverse(
+            'posts:profile_follow', args=(self.authors[0].username,)))
+        self.assertEqual(Follow.objects.filter(
+            user=self.reader, author=self.authors[0]).count(), 1)
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                Follow.objects.create(user=self.reader, author=self.authors[0])
+
+    def test_bulk_follow_and_unfollow(self):
+        """Пакетная подписка и отписка от нескольких авторов."""
+        usernames = [author.username for author in self.authors]
+        url = reverse('posts:bulk_follow')
+        response = self.client.post(url, {'author': usernames + ['Reader']})
+        self.assertRedirects(response, reverse('posts:follow_index'))
+        self.assertEqual(
+            followed_author_ids(self.reader),
+            {author.pk for author in self.authors},
+        )
+        self.client.post(url, {'author': usernames[:2], 'action': 'unfollow'})
+        self.assertEqual(
+            followed_author_ids(self.reader), {self.authors[2].pk})
+        self.assertEqual(self.client.get(url).status_code, 405)
+
+
+class GroupDirectoryTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.authors = [
+            User.objects.create_user(username=f'Author{number}')
+            for number in range(2)
+        ]
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.empty_group = Group.objects.create(
+            title='Пустая группа',
+            slug='empty-slug',
+            description='Тестовое описание',
+        )
+        for number in range(3):
+            Post.objects.create(
+                author=cls.authors[number > 0],
+                text='Тестовый текст',
+                group=cls.group,
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def author_counts(self, group):
+        return dict(GroupAuthorStats.objects.filter(group=group).values_list(
+            'author__username', 'post_count'))
+
+    def test_stats_follow_posts(self):
+        """Статистика группы меняется при создании, переносе и удалении."""
+        stats = GroupStats.objects.get(group=self.group)
+        latest = self.group.posts.latest('pub_date')
+        self.assertEqual(stats.post_count, 3)
+        self.assertEqual(stats.last_activity, latest.pub_date)
+        self.assertEqual(
+            self.author_counts(self.group), {'Author0': 1, 'Author1': 2})
+        latest.group = self.empty_group
+        latest.save()
+        latest.refresh_from_db()
+        self.assertEqual(
+            self.author_counts(self.empty_group), {latest.author.username: 1})
+        self.assertEqual(
+            GroupStats.objects.get(group=self.empty_group).last_activity,
+            latest.pub_date,
+        )
+        latest.delete()
+        stats.refresh_from_db()
+        self.assertEqual(stats.post_count, 2)
+        self.assertEqual(
+            stats.last_activity,
+            self.group.posts.latest('pub_date').pub_date,
+        )
+        self.assertEqual(
+            GroupStats.objects.get(group=self.empty_group).post_count, 0)
+        self.assertEqual(self.author_counts(self.empty_group), {})
+
+    def test_concurrent_insert_falls_back_to_update(self):
+        """Строку статистики вставил параллельный запрос — счётчик растёт."""
+        stats = GroupAuthorStats.objects.filter(
+            group=self.group, author=self.authors[0])
+        update = QuerySet.update
+        calls = []
+
+        def racing_update(queryset, **kwargs):
+            calls.append(kwargs)
+            if len(calls) == 1:
+                return 0
+            return update(queryset, **kwargs)
+
+        with patch.object(QuerySet, 'update', racing_update):
+            increment(
+                stats, group_id=self.group.pk, author_id=self.authors[0].pk)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(stats.get().post_count, 2)
+
+    def test_rebuild_matches_incremental_stats(self):
+        """Пересчёт с нуля даёт те же числа, что и сигналы."""
+        Post.objects.bulk_create(
+            Post(author=self.authors[0], text='Текст', group=self.group)
+            for _ in range(3)
+        )
+        rebuild_group_stats()
+        self.assertEqual(
+            GroupStats.objects.get(group=self.group).post_count, 6)
+        self.assertEqual(
+            self.author_counts(self.group), {'Author0': 4, 'Author1': 2})
+        self.assertTrue(GroupStats.objects.filter(
+            group=self.empty_group, post_count=0).exists())
+
+    def test_directory_shows_stats_and_top_authors(self):
+        """Каталог групп не агрегирует посты и кэширует активных авторов."""
+        url = reverse('posts:group_index')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertFalse(any(
+            'posts_post' in query['sql']
+            for query in queries.captured_queries
+        ))
+        groups = list(response.context['page_obj'])
+        self.assertEqual(groups, [self.group, self.empty_group])
+        self.assertEqual(
+            [(row.author.username, row.post_count)
+             for row in groups[0].top_authors],
+            [('Author1', 2), ('Author0', 1)],
+        )
+        self.assertContains(response, 'Записей: 3')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertFalse(any(
+            'posts_groupauthorstats' in query['sql']
+            for query in queries.captured_queries
+        ))
+        Post.objects.create(
+            author=self.authors[0], text='Текст', group=self.group)
+        Post.objects.create(
+            author=self.authors[0], text='Текст', group=self.group)
+        response = self.client.get(url)
+        self.assertEqual(
+            response.context['page_obj'][0].top_authors[0].author,
+            self.authors[0],
+        )
+
+    def test_group_lookup_cached_until_group_changes(self):
+        """Группа по slug берётся из кэша до её изменения."""
+        self.assertEqual(group_by_slug('test-slug'), self.group)
+        with self.assertNumQueries(0):
+            group_by_slug('test-slug')
+        group = Group.objects.get(pk=self.group.pk)
+        group.slug = 'new-slug'
+        group.save()
+        response = self.client.get(
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(group_by_slug('new-slug').slug, 'new-slug')
+
+
+class ArchiveTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.old_posts = [
+            Post.objects.create(
+                author=cls.user, text=f'Старый пост {number}',
+                group=cls.group,
+            )
+            for number in range(3)
+        ]
+        for post in cls.old_posts:
+            Comment.objects.create(
+                post=post, author=cls.reader, text='Комментарий')
+        cls.cutoff = timezone.now()
+        cls.new_post = Post.objects.create(
+            author=cls.user, text='Новый пост', group=cls.group)
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        # purge_user обнуляет pk удалённого объекта, поэтому свой экземпляр.
+        self.author = User.objects.get(pk=self.user.pk)
+
+    def test_old_posts_move_to_archive_in_batches(self):
+        """Старые посты переносятся в архив вместе с комментариями."""
+        self.assertEqual(archive_posts(self.cutoff, batch_size=2), 3)
+        self.assertEqual(archive_posts(self.cutoff, batch_size=2), 0)
+        self.assertEqual(list(Post.objects.all()), [self.new_post])
+        self.assertEqual(
+            set(ArchivedPost.objects.values_list('pk', flat=True)),
+            {post.pk for post in self.old_posts},
+        )
+        self.assertEqual(ArchivedComment.objects.count(), 3)
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(
+            GroupStats.objects.get(group=self.group).post_count, 1)
+
+    def test_post_detail_reads_through_archive(self):
+        """Страница архивного поста открывается по прежнему адресу."""
+        post = self.old_posts[0]
+        archive_posts(self.cutoff, batch_size=10)
+        self.client.force_login(self.user)
+        response = self.client.get(
+            reverse('posts:post_detail', args=(post.pk,)))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['archived'])
+        self.assertEqual(response.context['post'].text, post.text)
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            ['Комментарий'],
+        )
+        self.assertNotContains(
+            response, reverse('posts:add_comment', args=(post.pk,)))
+        self.assertNotContains(
+            response, reverse('posts:edit', args=(post.pk,)))
+        response = self.client.get(
+            reverse('posts:comment_list', args=(post.pk,)))
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.new_post.pk,)))
+        self.assertFalse(response.context['archived'])
+
+    def test_purge_user_in_batches(self):
+        """Пользователь удаляется порциями вместе с постами и архивом."""
+        archive_posts(self.cutoff, batch_size=10)
+        Comment.objects.create(
+            post=self.new_post, author=self.reader, text='Комментарий')
+        with CaptureQueriesContext(connection) as queries:
+            purge_user(self.author, batch_size=2)
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(ArchivedPost.objects.exists())
+        self.assertFalse(ArchivedComment.objects.exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertTrue(User.objects.filter(pk=self.reader.pk).exists())
+        deletes = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('DELETE FROM "posts_archivedpost"')
+        ]
+        self.assertEqual(len(deletes), 2)
+
+    def test_purge_user_deactivates_first(self):
+        """Прерванное удаление оставляет пользователя неактивным."""
+        with patch('posts.archive.delete_in_batches',
+                   side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                purge_user(self.author, batch_size=2)
+        self.assertFalse(User.objects.get(pk=self.user.pk).is_active)
+        purge_user(self.author, batch_size=2)
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
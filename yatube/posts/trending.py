@@ -0,0 +1,61 @@
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Follow, Post, TrendingPost
+from .utils import EPOCH, post_cards
+
+TRENDING_PER_PAGE = settings.PAGINATOR
+
+
+def hot_score(comments, followers, pub_date):
+    """Рейтинг поста для популярной ленты.
+
+    Активность — свежие комментарии и охват подписчиков автора — берётся в
+    логарифме, а затухание со временем задаётся датой публикации. Рейтинг
+    меняется, только когда меняется число комментариев в окне: при новой
+    активности и когда старые комментарии из окна выходят, поэтому
+    ``refresh_trending`` пересчитывает и посты с ненулевым счётчиком.
+    """
+    activity = comments + settings.TRENDING_REACH_WEIGHT * math.log1p(
+        followers)
+    age = (pub_date - EPOCH).total_seconds()
+    return math.log10(1 + activity) + age / settings.TRENDING_DECAY
+
+
+def update_post_score(post):
+    since = timezone.now() - timedelta(hours=settings.TRENDING_WINDOW_HOURS)
+    comments = post.comment.filter(created__gte=since).count()
+    followers = Follow.objects.filter(author_id=post.author_id).count()
+    TrendingPost.objects.update_or_create(
+        post=post,
+        defaults={
+            'score': hot_score(comments, followers, post.pub_date),
+            'comments': comments,
+        },
+    )
+
+
+def trending_page(cursor=None):
+    """Порция популярных постов по курсору ``<score>_<post_id>``."""
+    ranked = TrendingPost.objects.order_by('-score', '-post')
+    try:
+        score, post_id = cursor.split('_')
+        score, post_id = float(score), int(post_id)
+    except (AttributeError, ValueError):
+        pass
+    else:
+        ranked = ranked.filter(
+            Q(score__lt=score) | Q(score=score, post_id__lt=post_id))
+    rows = list(
+        ranked.values_list('post_id', 'score')[:TRENDING_PER_PAGE + 1])
+    next_cursor = None
+    if len(rows) > TRENDING_PER_PAGE:
+        rows = rows[:TRENDING_PER_PAGE]
+        next_cursor = f'{rows[-1][1]!r}_{rows[-1][0]}'
+    posts = post_cards(Post.objects.filter(pk__in=[pk for pk, _ in rows]))
+    by_pk = {post.pk: post for post in posts}
+    return [by_pk[pk] for pk, _ in rows if pk in by_pk], next_cursor
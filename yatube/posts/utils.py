@@ -1,10 +1,125 @@
+from datetime import datetime, timedelta
+
+from django.core.cache import cache
 from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from yatube.settings import (
+    COMMENTS_PER_PAGE, PAGINATOR, PAGINATOR_WINDOW, POST_COUNT_TIMEOUT,
+)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Колонки, которые нужны карточке поста в ленте.
+CARD_FIELDS = (
+    'pub_date',
+    'image',
+    'excerpt_html',
+    'author',
+    'author__username',
+    'author__first_name',
+    'author__last_name',
+    'group',
+    'group__slug',
+    'group__title',
+)
+
+
+def post_count_key(scope, pk=None):
+    return f'post_count:{scope}' if pk is None else f'post_count:{scope}:{pk}'
+
+
+def cached_count(key, queryset, timeout=POST_COUNT_TIMEOUT):
+    """Возвращает число записей из кэша, считая COUNT(*) только при промахе.
+
+    Счётчики поддерживаются сигналами постов, поэтому значение может
+    ненадолго отставать от базы, что для пагинации допустимо.
+    """
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, timeout)
+    return count
+
+
+class CachedCountPaginator(Paginator):
+    """Пагинатор, который берёт общее число записей из кэша."""
+
+    def __init__(self, object_list, per_page, count_key=None,
+                 count_timeout=POST_COUNT_TIMEOUT, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_key = count_key
+        self.count_timeout = count_timeout
 
-from yatube.settings import PAGINATOR
+    @cached_property
+    def count(self):
+        if self.count_key is None:
+            return super().count
+        return cached_count(
+            self.count_key, self.object_list, self.count_timeout)
 
+    def page_window(self, number, on_each_side=PAGINATOR_WINDOW):
+        """Номера страниц вокруг текущей вместо полного page_range."""
+        first = max(number - on_each_side, 1)
+        last = min(number + on_each_side, self.num_pages)
+        return range(first, last + 1)
 
-def paginate(request, posts):
-    paginator = Paginator(posts, PAGINATOR)
+
+def paginate(request, posts, count_key=None,
+             count_timeout=POST_COUNT_TIMEOUT):
+    paginator = CachedCountPaginator(
+        posts, PAGINATOR, count_key=count_key, count_timeout=count_timeout)
     page_number = request.GET.get('page')
 
-    return paginator.get_page(page_number)
+    page_obj = paginator.get_page(page_number)
+    page_obj.page_window = paginator.page_window(page_obj.number)
+    return page_obj
+
+
+def post_cards(posts):
+    """Ограничивает выборку постов колонками, нужными карточке ленты."""
+    return posts.select_related('author', 'group').only(*CARD_FIELDS)
+
+
+def post_surrogate_keys(post):
+    """Ключи Surrogate-Key всех публичных страниц, где виден пост."""
+    keys = ['index', f'post-{post.pk}', f'author-{post.author.username}']
+    if post.group_id:
+        keys += [f'group-{post.group.slug}', 'groups']
+    return keys
+
+
+def encode_cursor(comment):
+    micros = (comment.created - EPOCH) // timedelta(microseconds=1)
+    return f'{micros}-{comment.pk}'
+
+
+def decode_cursor(cursor):
+    try:
+        micros, pk = (int(part) for part in cursor.split('-'))
+        return EPOCH + timedelta(microseconds=micros), pk
+    except (AttributeError, ValueError, OverflowError):
+        return None, None
+
+
+def comments_batch(comments, cursor=None):
+    """Возвращает очередную порцию комментариев и курсор следующей.
+
+    Курсор указывает на последний показанный комментарий, поэтому выборка
+    идёт по индексу ``(post, -created)`` без OFFSET.
+    """
+    created, pk = decode_cursor(cursor)
+    if pk is not None:
+        comments = comments.filter(
+            Q(created__lt=created) | Q(created=created, pk__lt=pk)
+        )
+    batch = list(
+        comments.select_related('author')
+        .order_by('-created', '-pk')[:COMMENTS_PER_PAGE + 1]
+    )
+    if len(batch) <= COMMENTS_PER_PAGE:
+        return batch, None
+    batch = batch[:COMMENTS_PER_PAGE]
+    return batch, encode_cursor(batch[-1])
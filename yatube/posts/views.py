@@ -1,60 +1,137 @@
+import time
+
 from django.shortcuts import get_object_or_404, render, redirect
 from django.contrib.auth.decorators import login_required
-from django.views.decorators.cache import cache_page
+from django.db.models import F
+from django.views.decorators.cache import cache_control, cache_page
+from django.views.decorators.http import require_POST
+
+from core.edge import add_surrogate_keys, cache_policy
+from tasks.queue import enqueue
+from yatube.settings import FOLLOW_COUNT_TIMEOUT
 
+from .archive import get_post_or_archived
+from .follows import follow_authors, followed_author_ids, unfollow_authors
 from .forms import PostForm, CommentForm
-from .models import Group, Follow, Post, User
-from .utils import paginate
+from .groups import group_by_slug, top_authors
+from .models import Group, Post, User
+from .trending import trending_page
+from .utils import (
+    cached_count, comments_batch, paginate, post_cards, post_count_key,
+)
 
 
+def schedule_suggestions(user):
+    enqueue(
+        'posts.refresh_suggestions',
+        key=f'suggestions:{user.pk}:{int(time.time()) // 60}',
+        delay=60,
+        user_id=user.pk,
+    )
+
+
+@cache_policy(s_maxage=20)
 @cache_page(20, key_prefix='index_page')
 def index(request):
-    post_list = Post.objects.all().select_related('author', 'group')
-    page_obj = paginate(request, post_list)
+    post_list = post_cards(Post.objects.all())
+    page_obj = paginate(request, post_list, post_count_key('all'))
     context = {
         'page_obj': page_obj
     }
-    return render(request, 'posts/index.html', context)
+    response = render(request, 'posts/index.html', context)
+    return add_surrogate_keys(response, 'index')
+
+
+@cache_policy()
+def trending(request):
+    posts, next_cursor = trending_page(request.GET.get('cursor'))
+    context = {
+        'posts': posts,
+        'next_cursor': next_cursor,
+        'followed': followed_author_ids(request.user),
+    }
+    response = render(request, 'posts/trending.html', context)
+    return add_surrogate_keys(response, 'trending')
+
+
+@cache_policy()
+def group_index(request):
+    groups = Group.objects.select_related('stats').order_by(
+        F('stats__last_activity').desc(nulls_last=True), 'title')
+    page_obj = paginate(request, groups)
+    authors = top_authors([group.pk for group in page_obj])
+    for group in page_obj:
+        group.top_authors = authors[group.pk]
+    context = {
+        'page_obj': page_obj,
+    }
+    response = render(request, 'posts/group_index.html', context)
+    return add_surrogate_keys(response, 'groups')
 
 
+@cache_policy()
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
-    page_obj = paginate(request, post_list)
+    group = group_by_slug(slug)
+    post_list = post_cards(group.posts.all())
+    page_obj = paginate(
+        request, post_list, post_count_key('group', group.pk))
     context = {
         'group': group,
         'page_obj': page_obj,
+        'followed': followed_author_ids(request.user),
     }
 
-    return render(request, 'posts/group_list.html', context)
+    response = render(request, 'posts/group_list.html', context)
+    return add_surrogate_keys(response, f'group-{group.slug}')
 
 
+@cache_policy()
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
-    following = request.user.is_authenticated and Follow.objects.filter(
-        user=request.user, author=author
-    ).exists()
-    page_obj = paginate(request, post_list)
+    post_list = post_cards(author.posts.all())
+    following = author.pk in followed_author_ids(request.user)
+    page_obj = paginate(
+        request, post_list, post_count_key('author', author.pk))
     context = {
         'author': author,
         'page_obj': page_obj,
         'following': following,
     }
-    return render(request, 'posts/profile.html', context)
+    response = render(request, 'posts/profile.html', context)
+    return add_surrogate_keys(response, f'author-{author.username}')
 
 
+@cache_policy(s_maxage=30)
 def post_detail(request, post_id):
-    post = get_object_or_404(
-        Post.objects.select_related('author', 'group'), pk=post_id)
+    post, archived = get_post_or_archived(
+        post_id, Post.objects.select_related('author', 'group'))
     form = CommentForm(request.POST or None)
-    comments = post.comment.all()
+    comments, next_cursor = comments_batch(post.comment.all())
     context = {
         'post': post,
+        'archived': archived,
+        'posts_count': cached_count(
+            post_count_key('author', post.author_id), post.author.posts),
         'comments': comments,
+        'next_cursor': next_cursor,
         'form': form,
     }
-    return render(request, 'posts/post_detail.html', context)
+    response = render(request, 'posts/post_detail.html', context)
+    return add_surrogate_keys(response, f'post-{post.pk}')
+
+
+@cache_policy(s_maxage=30)
+def comment_list(request, post_id):
+    post, _ = get_post_or_archived(post_id)
+    comments, next_cursor = comments_batch(
+        post.comment.all(), request.GET.get('cursor'))
+    context = {
+        'post': post,
+        'comments': comments,
+        'next_cursor': next_cursor,
+    }
+    response = render(request, 'includes/comment_list.html', context)
+    return add_surrogate_keys(response, f'post-{post.pk}')
 
 
 @login_required
@@ -72,6 +149,13 @@ def post_create(request):
     post = form.save(commit=False)
     post.author = request.user
     post.save()
+    enqueue('posts.update_trending', post_id=post.pk)
+    if post.image:
+        enqueue(
+            'posts.generate_thumbnail',
+            key=f'thumbnail:{post.image.name}',
+            post_id=post.pk,
+        )
     return redirect('posts:profile', username=request.user)
 
 
@@ -87,6 +171,12 @@ def post_edit(request, post_id):
     )
     if form.is_valid():
         post.save()
+        if 'image' in form.changed_data and post.image:
+            enqueue(
+                'posts.generate_thumbnail',
+                key=f'thumbnail:{post.image.name}',
+                post_id=post.pk,
+            )
         return redirect('posts:post_detail', post_id)
     context = {
         'form': form,
@@ -105,16 +195,36 @@ def add_comment(request, post_id):
         comment.author = request.user
         comment.post = post
         comment.save()
+        enqueue(
+            'posts.notify_comment',
+            key=f'notify_comment:{comment.pk}',
+            comment_id=comment.pk,
+        )
+        enqueue(
+            'posts.update_trending',
+            key=f'trending:{post.pk}:{int(time.time()) // 60}',
+            delay=60,
+            post_id=post.pk,
+        )
     return redirect('posts:post_detail', post_id)
 
 
 @login_required
+@cache_control(private=True, max_age=0)
 def follow_index(request):
     user = get_object_or_404(User, username=request.user)
-    posts_follow = Post.objects.filter(author__following__user=user)
-    page_obj = paginate(request, posts_follow)
+    posts_follow = post_cards(
+        Post.objects.filter(author__following__user=user))
+    page_obj = paginate(
+        request, posts_follow, post_count_key('follow', user.pk),
+        FOLLOW_COUNT_TIMEOUT)
+    suggestions = user.follow_suggestions.select_related('author').only(
+        'author', 'author__username', 'author__first_name',
+        'author__last_name',
+    )
     context = {
         'page_obj': page_obj,
+        'suggestions': suggestions[:5],
     }
     return render(request, 'posts/follow.html', context)
 
@@ -123,7 +233,8 @@ def follow_index(request):
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if author != request.user:
-        Follow.objects.get_or_create(user=request.user, author=author)
+        if follow_authors(request.user, [author.username]):
+            schedule_suggestions(request.user)
         return redirect('posts:follow_index')
     return redirect('posts:profile', username=request.user)
 
@@ -131,7 +242,21 @@ def profile_follow(request, username):
 @login_required
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
-    if author.following.exists():
-        Follow.objects.filter(user=request.user, author=author).delete()
+    if unfollow_authors(request.user, [author.username]):
+        schedule_suggestions(request.user)
         return redirect('posts:follow_index')
-    return redirect('posts:profale', username=author.username)
+    return redirect('posts:profile', username=author.username)
+
+
+@login_required
+@require_POST
+def bulk_follow(request):
+    """Подписка или отписка сразу от нескольких авторов (поля ``author``)."""
+    usernames = request.POST.getlist('author')
+    if request.POST.get('action') == 'unfollow':
+        changed = unfollow_authors(request.user, usernames)
+    else:
+        changed = follow_authors(request.user, usernames)
+    if changed:
+        schedule_suggestions(request.user)
+    return redirect('posts:follow_index')
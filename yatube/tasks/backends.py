@@ -0,0 +1,106 @@
+import base64
+import json
+from email.mime.base import MIMEBase
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.core.mail.backends.base import BaseEmailBackend
+
+from .models import QueuedEmail, Task
+from .queue import enqueue
+
+MESSAGE_FIELDS = (
+    'subject', 'body', 'from_email', 'to', 'cc', 'bcc', 'reply_to',
+    'extra_headers', 'content_subtype', 'mixed_subtype',
+)
+
+
+def dump_attachment(attachment):
+    if isinstance(attachment, MIMEBase):
+        raise ValueError(
+            'Вложение MIMEBase нельзя поставить в очередь, передайте '
+            'его как (имя, содержимое, MIME-тип)')
+    filename, content, mimetype = attachment
+    if isinstance(content, str):
+        return {'filename': filename, 'text': content, 'mimetype': mimetype}
+    return {
+        'filename': filename,
+        'content': base64.b64encode(content).decode('ascii'),
+        'mimetype': mimetype,
+    }
+
+
+def load_attachment(data):
+    content = data.get('text')
+    if content is None:
+        content = base64.b64decode(data['content'])
+    return data['filename'], content, data['mimetype']
+
+
+def dump_message(message):
+    """Письмо в JSON для очереди.
+
+    Сохраняются альтернативы (HTML), вложения и кодировка, поэтому
+    воркер отправит то же письмо; то, что сохранить нельзя, вызывает
+    ``ValueError``, а не уходит урезанным.
+    """
+    data = {field: getattr(message, field) for field in MESSAGE_FIELDS}
+    data['alternatives'] = list(getattr(message, 'alternatives', ()))
+    data['attachments'] = [
+        dump_attachment(attachment) for attachment in message.attachments]
+    data['encoding'] = (
+        None if message.encoding is None else str(message.encoding))
+    return json.dumps(data)
+
+
+def load_message(raw):
+    data = json.loads(raw)
+    alternatives = data.pop('alternatives')
+    attachments = data.pop('attachments', [])
+    content_subtype = data.pop('content_subtype', 'plain')
+    mixed_subtype = data.pop('mixed_subtype', 'mixed')
+    encoding = data.pop('encoding', None)
+    data['headers'] = data.pop('extra_headers')
+    message = EmailMultiAlternatives(
+        alternatives=[tuple(item) for item in alternatives],
+        attachments=[load_attachment(item) for item in attachments],
+        **data,
+    )
+    message.content_subtype = content_subtype
+    message.mixed_subtype = mixed_subtype
+    message.encoding = encoding
+    return message
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Складывает письма в очередь вместо отправки внутри запроса.
+
+    Письма отправляет воркер задач пачками через
+    ``settings.EMAIL_QUEUE_BACKEND``.
+    """
+
+    def send_messages(self, email_messages):
+        messages = [message for message in email_messages if message.to
+                    or message.cc or message.bcc]
+        if not messages:
+            return 0
+        queued = []
+        for message in messages:
+            try:
+                queued.append(QueuedEmail(message=dump_message(message)))
+            except ValueError:
+                if not self.fail_silently:
+                    raise
+        if not queued:
+            return 0
+        QueuedEmail.objects.bulk_create(queued)
+        flush_pending = Task.objects.filter(
+            name='tasks.flush_email',
+            status=Task.PENDING,
+        ).exists()
+        if not flush_pending:
+            enqueue(
+                'tasks.flush_email',
+                delay=settings.EMAIL_QUEUE_FLUSH_DELAY,
+            )
+        return len(queued)
@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tasks.models import Task
+from tasks.queue import queue_stats, run_pending
+
+
+class Command(BaseCommand):
+    help = 'Запускает воркер фоновых задач.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=1.0,
+            help='Пауза между опросами пустой очереди, секунды.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Обработать готовые задачи и завершиться.',
+        )
+
+    def handle(self, *args, **options):
+        totals = {Task.DONE: 0, Task.PENDING: 0, Task.FAILED: 0}
+        busy = 0.0
+        try:
+            while True:
+                stats = run_pending(options['batch_size'])
+                busy += stats.pop('elapsed')
+                processed = sum(stats.values())
+                for status, count in stats.items():
+                    totals[status] += count
+                if not processed:
+                    if options['once']:
+                        break
+                    time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+        processed = sum(totals.values())
+        rate = processed / busy if busy else 0.0
+        self.stdout.write(
+            f'Выполнено: {totals[Task.DONE]}, '
+            f'отложено на повтор: {totals[Task.PENDING]}, '
+            f'с ошибкой: {totals[Task.FAILED]}, '
+            f'пропускная способность: {rate:.1f} задач/с'
+        )
+        self.stdout.write(f'Очередь: {queue_stats()}')
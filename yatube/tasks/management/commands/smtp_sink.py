@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+from django.core.management.base import BaseCommand
+
+
+class SMTPSink:
+    """Минимальный SMTP-сервер, который принимает и выбрасывает письма."""
+
+    def __init__(self):
+        self.received = 0
+        self.started = time.perf_counter()
+
+    async def handle(self, reader, writer):
+        writer.write(b'220 yatube smtp sink\r\n')
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            command = line[:4].upper()
+            if command == b'DATA':
+                writer.write(b'354 End data with <CR><LF>.<CR><LF>\r\n')
+                if not await self.read_data(reader):
+                    break
+                self.received += 1
+                writer.write(b'250 OK\r\n')
+            elif command == b'EHLO':
+                writer.write(b'250-yatube\r\n250 8BITMIME\r\n')
+            elif command == b'QUIT':
+                writer.write(b'221 Bye\r\n')
+                await writer.drain()
+                break
+            else:
+                writer.write(b'250 OK\r\n')
+            await writer.drain()
+        writer.close()
+
+    async def read_data(self, reader):
+        """Читает тело письма построчно до строки из одной точки.
+
+        Письмо не собирается целиком, поэтому вложения любого размера не
+        упираются в лимит буфера потока. ``False`` — клиент отключился.
+        """
+        while True:
+            line = await reader.readline()
+            if not line:
+                return False
+            if line == b'.\r\n':
+                return True
+
+    def rate(self):
+        elapsed = time.perf_counter() - self.started
+        return self.received / elapsed if elapsed else 0.0
+
+
+class Command(BaseCommand):
+    help = (
+        'Запускает локальный SMTP-приёмник для замера пропускной '
+        'способности отправки почты.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=1025)
+        parser.add_argument(
+            '--report',
+            type=float,
+            default=5.0,
+            help='Период вывода статистики, секунды.',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            asyncio.run(self.serve(options))
+        except KeyboardInterrupt:
+            pass
+
+    async def serve(self, options):
+        sink = SMTPSink()
+        server = await asyncio.start_server(
+            sink.handle, options['host'], options['port'])
+        self.stdout.write(
+            f'SMTP-приёмник слушает {options["host"]}:{options["port"]}')
+        async with server:
+            while True:
+                await asyncio.sleep(options['report'])
+                self.stdout.write(
+                    f'Принято писем: {sink.received}, '
+                    f'{sink.rate():.1f} писем/с'
+                )
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-19 14:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0002_queuedemail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='claimed',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Дата захвата'),
+        ),
+    ]
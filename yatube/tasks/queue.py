@@ -0,0 +1,114 @@
+import json
+import logging
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def task(name):
+    """Регистрирует функцию как обработчик задач с именем ``name``."""
+    def decorator(func):
+        _registry[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, key=None, delay=0, **payload):
+    """Ставит задачу в очередь.
+
+    Повторный вызов с тем же ``key`` не создаёт новую задачу, а возвращает
+    уже существующую.
+    """
+    if name not in _registry:
+        raise KeyError(f'Неизвестная задача: {name}')
+    fields = {
+        'name': name,
+        'payload': json.dumps(payload),
+        'run_at': timezone.now() + timedelta(seconds=delay),
+    }
+    if key is None:
+        return Task.objects.create(**fields)
+    try:
+        with transaction.atomic():
+            return Task.objects.create(key=key, **fields)
+    except IntegrityError:
+        return Task.objects.get(key=key)
+
+
+def claim(batch_size):
+    """Забирает готовые к запуску задачи, помечая их как выполняемые.
+
+    Захват делается условным UPDATE, поэтому несколько воркеров могут
+    работать с одной таблицей без блокировок. Задача, захваченная
+    раньше чем ``TASK_LEASE`` секунд назад и так и не завершённая,
+    считается потерянной вместе с воркером и захватывается снова.
+    """
+    now = timezone.now()
+    ready = Q(status=Task.PENDING, run_at__lte=now) | Q(
+        status=Task.RUNNING,
+        claimed__lt=now - timedelta(seconds=settings.TASK_LEASE),
+    )
+    candidates = Task.objects.filter(ready).values_list(
+        'pk', flat=True)[:batch_size]
+    claimed = []
+    for pk in candidates:
+        updated = Task.objects.filter(ready, pk=pk).update(
+            status=Task.RUNNING,
+            claimed=now,
+            attempts=F('attempts') + 1,
+        )
+        if updated:
+            claimed.append(pk)
+    return Task.objects.filter(pk__in=claimed)
+
+
+def execute(task_obj):
+    """Выполняет задачу и возвращает её итоговый статус."""
+    try:
+        handler = _registry[task_obj.name]
+        handler(**json.loads(task_obj.payload))
+    except Exception:
+        task_obj.last_error = traceback.format_exc()
+        if task_obj.attempts < task_obj.max_attempts:
+            task_obj.status = Task.PENDING
+            task_obj.run_at = timezone.now() + timedelta(
+                seconds=2 ** task_obj.attempts)
+        else:
+            task_obj.status = Task.FAILED
+            task_obj.finished = timezone.now()
+        logger.warning('Задача %s завершилась ошибкой', task_obj.pk)
+    else:
+        task_obj.status = Task.DONE
+        task_obj.finished = timezone.now()
+    task_obj.save(
+        update_fields=('status', 'run_at', 'finished', 'last_error'))
+    return task_obj.status
+
+
+def run_pending(batch_size=100):
+    """Выполняет одну порцию задач и возвращает счётчики по статусам."""
+    stats = {Task.DONE: 0, Task.PENDING: 0, Task.FAILED: 0}
+    started = time.perf_counter()
+    for task_obj in claim(batch_size):
+        stats[execute(task_obj)] += 1
+    stats['elapsed'] = time.perf_counter() - started
+    return stats
+
+
+def queue_stats():
+    return dict(
+        Task.objects.order_by()
+        .values_list('status')
+        .annotate(total=Count('pk'))
+    )
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.mail import get_connection
+
+from .backends import load_message
+from .models import QueuedEmail
+from .queue import task
+
+
+@task('tasks.flush_email')
+def flush_email():
+    """Отправляет накопившиеся письма через одно соединение."""
+    connection = get_connection(settings.EMAIL_QUEUE_BACKEND)
+    while True:
+        batch = list(
+            QueuedEmail.objects.all()[:settings.EMAIL_QUEUE_BATCH_SIZE])
+        if not batch:
+            break
+        connection.send_messages(
+            [load_message(queued.message) for queued in batch])
+        QueuedEmail.objects.filter(
+            pk__in=[queued.pk for queued in batch]).delete()
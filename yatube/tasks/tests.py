@@ -0,0 +1,186 @@
+import asyncio
+import os
+from datetime import timedelta
+from email.mime.text import MIMEText
+
+from django.conf import settings
+from django.core import mail
+from django.contrib.auth import get_user_model
+from django.core.mail import (
+    EmailMessage, EmailMultiAlternatives, get_connection, send_mail,
+)
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Post
+
+from .management.commands.smtp_sink import SMTPSink
+from .models import QueuedEmail, Task
+from .queue import enqueue, run_pending, task
+
+User = get_user_model()
+
+calls = []
+
+
+@task('tests.record')
+def record(value):
+    calls.append(value)
+
+
+@task('tests.fail')
+def fail():
+    raise RuntimeError('boom')
+
+
+class TaskQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_is_idempotent_by_key(self):
+        """Повторная постановка с тем же ключом не создаёт дубль."""
+        first = enqueue('tests.record', key='once', value=1)
+        second = enqueue('tests.record', key='once', value=2)
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_run_pending_executes_tasks(self):
+        """Воркер выполняет задачи и помечает их выполненными."""
+        enqueue('tests.record', value=1)
+        enqueue('tests.record', value=2)
+        stats = run_pending()
+        self.assertEqual(stats[Task.DONE], 2)
+        self.assertEqual(calls, [1, 2])
+        self.assertFalse(Task.objects.exclude(status=Task.DONE).exists())
+
+    def test_failed_task_is_retried_then_failed(self):
+        """Упавшая задача откладывается на повтор до исчерпания попыток."""
+        task_obj = enqueue('tests.fail')
+        Task.objects.filter(pk=task_obj.pk).update(max_attempts=2)
+        run_pending()
+        task_obj.refresh_from_db()
+        self.assertEqual(task_obj.status, Task.PENDING)
+        self.assertIn('boom', task_obj.last_error)
+        Task.objects.filter(pk=task_obj.pk).update(run_at=task_obj.created)
+        run_pending()
+        task_obj.refresh_from_db()
+        self.assertEqual(task_obj.status, Task.FAILED)
+        self.assertEqual(task_obj.attempts, 2)
+
+    def test_lost_running_task_is_claimed_again(self):
+        """Задача упавшего воркера снова выполняется после истечения аренды."""
+        lost = enqueue('tests.record', value=1)
+        busy = enqueue('tests.record', value=2)
+        now = timezone.now()
+        Task.objects.filter(pk=lost.pk).update(
+            status=Task.RUNNING, attempts=1,
+            claimed=now - timedelta(seconds=settings.TASK_LEASE + 1),
+        )
+        Task.objects.filter(pk=busy.pk).update(
+            status=Task.RUNNING, attempts=1, claimed=now)
+        stats = run_pending()
+        self.assertEqual(stats[Task.DONE], 1)
+        self.assertEqual(calls, [1])
+        lost.refresh_from_db()
+        self.assertEqual(lost.attempts, 2)
+        self.assertEqual(
+            Task.objects.get(pk=busy.pk).status, Task.RUNNING)
+
+    def test_unknown_task_is_rejected(self):
+        """Нельзя поставить в очередь незарегистрированную задачу."""
+        with self.assertRaises(KeyError):
+            enqueue('tests.unknown')
+
+
+class CommentNotificationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='Author', email='author@example.com')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.post = Post.objects.create(author=cls.author, text='Текст')
+
+    def test_add_comment_sends_notification_from_worker(self):
+        """Уведомление о комментарии отправляется воркером, а не view."""
+        self.client.force_login(self.reader)
+        self.client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.id}),
+            {'text': 'Комментарий'},
+        )
+        self.assertEqual(len(mail.outbox), 0)
+        run_pending()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, [self.author.email])
+
+
+@override_settings(
+    EMAIL_BACKEND='tasks.backends.QueuedEmailBackend',
+    EMAIL_QUEUE_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    EMAIL_QUEUE_FLUSH_DELAY=0,
+)
+class QueuedEmailBackendTest(TestCase):
+    def test_messages_are_sent_in_batch_by_worker(self):
+        """Письма копятся в очереди и уходят одной задачей воркера."""
+        for i in range(3):
+            send_mail(f'Тема {i}', 'Текст', None, ['user@example.com'])
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(QueuedEmail.objects.count(), 3)
+        self.assertEqual(
+            Task.objects.filter(name='tasks.flush_email').count(), 1)
+        run_pending()
+        self.assertEqual(
+            [message.subject for message in mail.outbox],
+            ['Тема 0', 'Тема 1', 'Тема 2'],
+        )
+        self.assertFalse(QueuedEmail.objects.exists())
+
+    def test_queued_message_keeps_html_attachments_and_encoding(self):
+        """Из очереди уходит то же письмо: HTML, вложения и кодировка."""
+        message = EmailMultiAlternatives(
+            'Тема', 'Текст', None, ['user@example.com'])
+        message.attach_alternative('<p>Текст</p>', 'text/html')
+        message.attach('notes.txt', 'Заметки', 'text/plain')
+        message.attach('logo.png', b'\x89PNG\x00\xff', 'image/png')
+        message.encoding = 'koi8-r'
+        message.send()
+        run_pending()
+        sent = mail.outbox[0]
+        self.assertEqual(sent.alternatives, [('<p>Текст</p>', 'text/html')])
+        self.assertEqual(sent.attachments, [
+            ('notes.txt', 'Заметки', 'text/plain'),
+            ('logo.png', b'\x89PNG\x00\xff', 'image/png'),
+        ])
+        self.assertEqual(sent.encoding, 'koi8-r')
+
+    def test_unserializable_message_is_rejected(self):
+        """Письмо, которое нельзя сохранить в очередь, не уходит урезанным."""
+        message = EmailMessage('Тема', 'Текст', None, ['user@example.com'])
+        message.attach(MIMEText('Текст'))
+        with self.assertRaises(ValueError):
+            message.send()
+        self.assertFalse(QueuedEmail.objects.exists())
+
+
+class SMTPSinkTest(SimpleTestCase):
+    def test_large_message_is_received(self):
+        """Письмо с крупным вложением принимается целиком."""
+        message = EmailMessage('Тема', 'Текст', 'from@example.com',
+                               ['user@example.com'])
+        message.attach('data.bin', os.urandom(256 * 1024),
+                       'application/octet-stream')
+        sink = SMTPSink()
+
+        async def scenario():
+            server = await asyncio.start_server(sink.handle, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                connection = get_connection(
+                    'django.core.mail.backends.smtp.EmailBackend',
+                    host='127.0.0.1', port=port)
+                await asyncio.get_running_loop().run_in_executor(
+                    None, connection.send_messages, [message, message])
+
+        asyncio.run(scenario())
+        self.assertEqual(sink.received, 2)
@@ -0,0 +1,107 @@
+import base64
+import hashlib
+import secrets
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher, BasePasswordHasher, PBKDF2PasswordHasher,
+    mask_hash,
+)
+from django.utils.crypto import constant_time_compare
+from django.utils.translation import gettext_noop as _
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2 с числом итераций из ``settings.PASSWORD_PBKDF2_ITERATIONS``."""
+
+    iterations = settings.PASSWORD_PBKDF2_ITERATIONS
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """Argon2 с параметрами из ``settings.PASSWORD_ARGON2``."""
+
+    time_cost = settings.PASSWORD_ARGON2['time_cost']
+    memory_cost = settings.PASSWORD_ARGON2['memory_cost']
+    parallelism = settings.PASSWORD_ARGON2['parallelism']
+
+
+class ScryptPasswordHasher(BasePasswordHasher):
+    """Хэширование паролей алгоритмом scrypt из стандартной библиотеки.
+
+    Формат хэша совместим с ``ScryptPasswordHasher`` из Django 4.0, поэтому
+    после обновления Django пароли переедут на встроенный хэшер без сброса.
+    """
+
+    algorithm = 'scrypt'
+    work_factor = settings.PASSWORD_SCRYPT['work_factor']
+    block_size = settings.PASSWORD_SCRYPT['block_size']
+    parallelism = settings.PASSWORD_SCRYPT['parallelism']
+    maxmem = 0
+
+    def salt(self):
+        return secrets.token_urlsafe(16)
+
+    def encode(self, password, salt, work_factor=None):
+        assert password is not None
+        assert salt and '$' not in salt
+        work_factor = work_factor or self.work_factor
+        hash_ = hashlib.scrypt(
+            password.encode(),
+            salt=salt.encode(),
+            n=work_factor,
+            r=self.block_size,
+            p=self.parallelism,
+            maxmem=self.maxmem or 128 * work_factor * self.block_size * 2,
+            dklen=64,
+        )
+        hash_ = base64.b64encode(hash_).decode('ascii').strip()
+        return '%s$%d$%s$%d$%d$%s' % (
+            self.algorithm, work_factor, salt, self.block_size,
+            self.parallelism, hash_,
+        )
+
+    def decode(self, encoded):
+        algorithm, work_factor, salt, block_size, parallelism, hash_ = (
+            encoded.split('$', 6))
+        assert algorithm == self.algorithm
+        return {
+            'algorithm': algorithm,
+            'work_factor': int(work_factor),
+            'salt': salt,
+            'block_size': int(block_size),
+            'parallelism': int(parallelism),
+            'hash': hash_,
+        }
+
+    def verify(self, password, encoded):
+        decoded = self.decode(encoded)
+        hasher = type(self)()
+        hasher.block_size = decoded['block_size']
+        hasher.parallelism = decoded['parallelism']
+        encoded_2 = hasher.encode(
+            password, decoded['salt'], decoded['work_factor'])
+        return constant_time_compare(encoded, encoded_2)
+
+    def safe_summary(self, encoded):
+        decoded = self.decode(encoded)
+        return OrderedDict([
+            (_('algorithm'), decoded['algorithm']),
+            (_('work factor'), decoded['work_factor']),
+            (_('block size'), decoded['block_size']),
+            (_('parallelism'), decoded['parallelism']),
+            (_('salt'), mask_hash(decoded['salt'])),
+            (_('hash'), mask_hash(decoded['hash'])),
+        ])
+
+    def must_update(self, encoded):
+        decoded = self.decode(encoded)
+        return (
+            decoded['work_factor'] != self.work_factor
+            or decoded['block_size'] != self.block_size
+            or decoded['parallelism'] != self.parallelism
+        )
+
+    def harden_runtime(self, password, encoded):
+        # Время работы scrypt определяется параметрами из самого хэша.
+        pass
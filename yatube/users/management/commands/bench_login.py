@@ -0,0 +1,40 @@
+import time
+
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет стоимость проверки пароля для каждого хэшера из '
+        'PASSWORD_HASHERS и оценивает, сколько ядер нужно под заданный '
+        'поток входов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=20)
+        parser.add_argument(
+            '--target',
+            type=float,
+            default=50.0,
+            help='Ожидаемое число входов в секунду в пике.',
+        )
+
+    def handle(self, *args, **options):
+        rounds = options['rounds']
+        for hasher in get_hashers():
+            try:
+                encoded = hasher.encode('benchmark', hasher.salt())
+            except ValueError as error:
+                self.stdout.write(f'{hasher.algorithm}: пропущен ({error})')
+                continue
+            started = time.process_time()
+            for _ in range(rounds):
+                hasher.verify('benchmark', encoded)
+            cpu_per_login = (time.process_time() - started) / rounds
+            self.stdout.write(
+                f'{hasher.algorithm}: {cpu_per_login * 1000:.1f} мс CPU '
+                f'на вход, {1 / cpu_per_login:.1f} входов/с на ядро, '
+                f'{options["target"] * cpu_per_login:.2f} ядер на '
+                f'{options["target"]:.0f} входов/с'
+            )
@@ -0,0 +1,35 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, make_password
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+User = get_user_model()
+
+SCRYPT_FIRST = [
+    'users.hashers.ScryptPasswordHasher',
+    'users.hashers.TunedPBKDF2PasswordHasher',
+]
+
+
+@override_settings(PASSWORD_HASHERS=SCRYPT_FIRST)
+class PasswordHashingTest(TestCase):
+    def test_scrypt_hash_verifies(self):
+        """Пароль, захэшированный scrypt, проходит проверку."""
+        encoded = make_password('Sup3r-secret')
+        self.assertTrue(encoded.startswith('scrypt$'))
+        self.assertTrue(check_password('Sup3r-secret', encoded))
+        self.assertFalse(check_password('wrong', encoded))
+
+    def test_login_rehashes_password_with_preferred_hasher(self):
+        """При входе старый хэш PBKDF2 прозрачно заменяется на scrypt."""
+        user = User.objects.create_user(username='TestUser')
+        user.password = make_password(
+            'Sup3r-secret', hasher='pbkdf2_sha256')
+        user.save()
+        response = self.client.post(
+            reverse('users:login'),
+            {'username': 'TestUser', 'password': 'Sup3r-secret'},
+        )
+        self.assertRedirects(response, reverse('posts:index'))
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('scrypt$'))
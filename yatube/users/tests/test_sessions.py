@@ -0,0 +1,68 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+User = get_user_model()
+
+
+class SessionEngineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+
+    def session_queries(self):
+        client = Client()
+        client.force_login(self.user)
+        client.get(reverse('about:author'))
+        with CaptureQueriesContext(connection) as queries:
+            client.get(reverse('about:author'))
+        return [
+            query['sql'] for query in queries.captured_queries
+            if 'django_session' in query['sql']
+        ]
+
+    @override_settings(
+        SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+    def test_cached_sessions_skip_database(self):
+        """С cached_db чтение сессии не обращается к базе."""
+        cache.clear()
+        self.assertEqual(self.session_queries(), [])
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.db')
+    def test_db_sessions_query_database(self):
+        """С db-сессиями каждый запрос читает django_session."""
+        self.assertEqual(len(self.session_queries()), 1)
+
+
+class ClearSessionsCommandTest(TestCase):
+    def test_only_expired_sessions_removed(self):
+        """Команда удаляет только просроченные сессии, порциями."""
+        now = timezone.now()
+        Session.objects.bulk_create(
+            Session(
+                session_key=f'expired{i}',
+                session_data='',
+                expire_date=now - timedelta(days=1),
+            )
+            for i in range(5)
+        )
+        Session.objects.create(
+            session_key='alive',
+            session_data='',
+            expire_date=now + timedelta(days=1),
+        )
+        call_command('clear_sessions', batch_size=2, stdout=StringIO())
+        self.assertEqual(
+            list(Session.objects.values_list('session_key', flat=True)),
+            ['alive'],
+        )
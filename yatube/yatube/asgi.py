@@ -0,0 +1,43 @@
+"""
+ASGI config for yatube project.
+
+Serves the live updates stream (server-sent events) natively. Django 2.2 has
+no ASGI handler, so every other path is delegated to the WSGI application
+running on a pool of ``ASGI_THREADS`` threads (see ``core.asgi_bridge``).
+
+Upgrade path: on Django 3.1+ replace ``django_application`` with
+``django.core.asgi.get_asgi_application()`` and turn read views such as
+``index`` and ``post_detail`` into ``async def`` views that gather their
+independent fetches (comments batch, post counts) with ``sync_to_async``.
+"""
+
+import os
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+django.setup()
+
+from django.conf import settings  # noqa: E402
+
+from core.asgi_bridge import WsgiBridge  # noqa: E402
+from core.events import live_updates  # noqa: E402
+from yatube.wsgi import application as wsgi_application  # noqa: E402
+
+django_application = WsgiBridge(wsgi_application, settings.ASGI_THREADS)
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    if scope['type'] != 'http':
+        return
+    if scope['path'] == settings.LIVE_UPDATES_PATH:
+        return await live_updates(scope, receive, send)
+    return await django_application(scope, receive, send)
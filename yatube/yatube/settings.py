@@ -23,7 +23,7 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 SECRET_KEY = 'd^!*wx-j1h15c2kji78hw4#12xk8sz!%u(^udt2e^xcs12hei+'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.getenv('DEBUG', 'True').lower() in ('1', 'true')
 
 ALLOWED_HOSTS = [
     'localhost',
@@ -40,7 +40,9 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
-    'django.contrib.admin',
+    'tasks.apps.TasksConfig',
+    # admin modules are discovered in urls.py, not on every django.setup()
+    'django.contrib.admin.apps.SimpleAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -51,29 +53,40 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.AnonymousPageCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'core.middleware.RateLimitMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+if not DEBUG:
+    TEMPLATE_LOADERS = [
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+    ]
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'core.context_processors.live.live_updates',
             ],
         },
     },
@@ -116,6 +129,34 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing
+# The first hasher in the list is used for new passwords; hashes made by the
+# others are transparently upgraded the next time the user logs in
+PASSWORD_HASHING_POLICY = os.getenv('PASSWORD_HASHING_POLICY', 'pbkdf2')
+
+PASSWORD_SCRYPT = {
+    'work_factor': 2 ** 14,
+    'block_size': 8,
+    'parallelism': 1,
+}
+PASSWORD_ARGON2 = {
+    'time_cost': 2,
+    'memory_cost': 102400,
+    'parallelism': 8,
+}
+PASSWORD_PBKDF2_ITERATIONS = 150000
+
+PASSWORD_HASHERS_BY_POLICY = {
+    'scrypt': 'users.hashers.ScryptPasswordHasher',
+    'argon2': 'users.hashers.TunedArgon2PasswordHasher',
+    'pbkdf2': 'users.hashers.TunedPBKDF2PasswordHasher',
+}
+PASSWORD_HASHERS = [PASSWORD_HASHERS_BY_POLICY[PASSWORD_HASHING_POLICY]] + [
+    hasher for policy, hasher in PASSWORD_HASHERS_BY_POLICY.items()
+    if policy != PASSWORD_HASHING_POLICY
+]
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/2.2/topics/i18n/
 
@@ -135,17 +176,91 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+# Hashed names need the manifest written by collectstatic, so they are only
+# used outside of DEBUG; yatube.wsgi then serves STATIC_ROOT itself
+if not DEBUG:
+    STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
 
 # Login
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 
+# Background tasks: a task claimed longer ago than this is considered lost
+# with its worker and is claimed again, seconds
+TASK_LEASE = 10 * 60
+
 # Email
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_BACKEND = 'tasks.backends.QueuedEmailBackend'
+EMAIL_QUEUE_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_QUEUE_BATCH_SIZE = 100
+EMAIL_QUEUE_FLUSH_DELAY = 1
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
+# Cache. Signals, logouts and rate limits change entries only in the cache
+# they write to, and LocMemCache lives inside one process. With several
+# workers set CACHE_LOCATION to memcached servers shared by all of them,
+# e.g. '127.0.0.1:11211' (needs python-memcached)
+CACHE_LOCATION = os.getenv('CACHE_LOCATION', '')
+SHARED_CACHE = bool(CACHE_LOCATION)
+if SHARED_CACHE:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+            'LOCATION': CACHE_LOCATION.split(','),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # Posts on page (Paginator)
 PAGINATOR = 10
+# Page links shown on each side of the current page
+PAGINATOR_WINDOW = 2
+# Lifetime of cached post counts used by the paginator, seconds. Signals
+# adjust the counts only in the cache of the process that saved the post, so
+# without a shared cache other workers may show stale totals this long
+POST_COUNT_TIMEOUT = 60 * 60 if SHARED_CACHE else 10
+# Follow feed counts are not reset for every follower when an author posts,
+# they just expire after this many seconds
+FOLLOW_COUNT_TIMEOUT = 60
+
+# Length of post excerpts on listing pages
+POST_EXCERPT_LENGTH = 500
+
+# Trending feed: comments newer than the window count as velocity, every
+# TRENDING_DECAY seconds of post age weighs as much as a tenfold activity
+TRENDING_WINDOW_HOURS = 48
+TRENDING_REACH_WEIGHT = 2.0
+TRENDING_DECAY = 45000
+
+# Follow suggestions kept per user and followers sampled per author
+FOLLOW_SUGGESTIONS = 10
+FOLLOW_SUGGESTIONS_FOLLOWER_SAMPLE = 200
+# Cached set of authors a user follows, reset on follow changes in the cache
+# of the process that made them; short-lived without a shared cache
+FOLLOW_STATE_TIMEOUT = 3600 if SHARED_CACHE else 10
+
+# Group directory: top authors shown per group, lifetime of cached groups
+# and top author lists, seconds. Signals reset them only in the cache of the
+# process that changed the data, so they are short-lived without a shared one
+GROUP_TOP_AUTHORS = 3
+GROUP_CACHE_TIMEOUT = 60 * 60 if SHARED_CACHE else 10
+
+# Posts older than this move to the archive tables (archive_posts), rows
+# moved or deleted per transaction by archive_posts and purge_user
+ARCHIVE_AFTER_DAYS = 365
+ARCHIVE_BATCH_SIZE = 500
+
+# Thumbnail size for post cards
+POST_THUMBNAIL = '960x339'
+
+# Comments per batch on post page
+COMMENTS_PER_PAGE = 20
 
 # Handlers
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
@@ -153,10 +268,59 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 # Media
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
-
-# Cache
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+MEDIA_MAX_AGE = 86400
+# Let the web server send media bodies: 'x-accel-redirect' (nginx, with an
+# internal location at MEDIA_ACCEL_PREFIX aliased to MEDIA_ROOT) or
+# 'x-sendfile' (Apache mod_xsendfile, lighttpd). Empty streams from Python
+MEDIA_ACCEL = os.getenv('MEDIA_ACCEL', '')
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+
+# Anonymous pages served from cache before sessions and auth
+ANONYMOUS_CACHE_URL_NAMES = ('posts:index', 'posts:group_list')
+ANONYMOUS_CACHE_TIMEOUT = 60
+
+# Edge cache (CDN) purge hook, called with a list of Surrogate-Key values
+EDGE_PURGE_BACKEND = 'core.edge.log_purge'
+
+# Live updates (server-sent events served by yatube.asgi). The URL is shown
+# to browsers only when set, i.e. when an ASGI server handles LIVE_UPDATES_PATH
+LIVE_UPDATES_PATH = '/events/'
+LIVE_UPDATES_URL = os.getenv('LIVE_UPDATES_URL')
+LIVE_UPDATES_BACKEND = 'core.pubsub.PollingBackend'
+LIVE_UPDATES_POLL_INTERVAL = 2
+LIVE_UPDATES_KEEPALIVE = 15
+LIVE_UPDATES_QUEUE_SIZE = 100
+
+# Rate limits for write endpoints, keyed by URL name. Counted per user, or
+# per IP address for anonymous clients, in the default cache, which must be
+# shared by all workers (check core.E001); on by default only then
+RATELIMIT_ENABLED = os.getenv(
+    'RATELIMIT_ENABLED', str(SHARED_CACHE)).lower() in ('1', 'true')
+RATELIMITS = {
+    'posts:create': {'rate': '30/m', 'methods': ('POST',)},
+    'posts:add_comment': {'rate': '60/m', 'methods': ('POST',)},
+    'posts:profile_follow': {'rate': '120/m'},
+    'posts:bulk_follow': {'rate': '30/m', 'methods': ('POST',)},
 }
+
+# Warm-up run by yatube.wsgi before serving (and before fork with preload):
+# templates, URL resolvers, DB connection and the cached anonymous pages
+WSGI_WARMUP = os.getenv('WSGI_WARMUP', 'True').lower() in ('1', 'true')
+# The cached pages are keyed by host and scheme, so they are warmed only when
+# WARMUP_HOST is set to the Host header production requests carry
+WARMUP_HOST = os.getenv('WARMUP_HOST', '')
+WARMUP_SCHEME = os.getenv('WARMUP_SCHEME', 'http')
+WARMUP_URL_NAMES = ('posts:index',)
+
+# Threads that run regular Django views under the ASGI entry point
+ASGI_THREADS = int(os.getenv('ASGI_THREADS', 8))
+
+# Sessions. cached_db reads sessions from the cache and writes through to
+# the database; it is the default only with a shared cache, otherwise a
+# logout in one worker would leave the session cached in the others
+SESSION_ENGINE = os.getenv(
+    'SESSION_ENGINE',
+    'django.contrib.sessions.backends.cached_db' if SHARED_CACHE
+    else 'django.contrib.sessions.backends.db',
+)
+SESSION_CLEANUP_BATCH_SIZE = 1000
@@ -14,3 +14,15 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+from django.conf import settings  # noqa: E402
+
+from core.static import StaticFilesLayer  # noqa: E402
+from core.warmup import warm_up  # noqa: E402
+
+if not settings.DEBUG:
+    application = StaticFilesLayer(
+        application, settings.STATIC_ROOT, settings.STATIC_URL)
+
+if settings.WSGI_WARMUP:
+    warm_up(application)